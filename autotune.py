@@ -0,0 +1,226 @@
+"""
+CPU inference autotuner
+
+Benchmarks combinations of Paddle cpu_threads, MKLDNN, executor size,
+recognition batch size and detector side length on the sample images,
+then writes the fastest combination that stays within the accuracy
+tolerance to config.PERF_PROFILE_PATH. OCRModelManager applies that
+profile at startup.
+
+Example usage:
+    python autotune.py --objective throughput
+    python autotune.py --objective latency --threads 2,4 --workers 1,2 --tolerance 0.01
+"""
+import argparse
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Any, List
+
+import config
+
+# The tuner only targets CPU inference; set this before the service reads it
+config.USE_GPU = False
+config.DEVICE = "cpu"
+
+from service import build_text_ocr_kwargs  # noqa: E402
+from service.ocr_service import parse_text_ocr_result  # noqa: E402
+from service.perf_profile import save_perf_profile  # noqa: E402
+
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse a comma separated list of integers"""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_bool_list(value: str) -> List[bool]:
+    """Parse a comma separated list of on/off flags"""
+    return [v.strip().lower() in ("1", "on", "true", "yes") for v in value.split(",") if v.strip()]
+
+
+def load_images(image_dir: Path) -> List[str]:
+    """Return the sample images in a directory"""
+    return sorted(
+        str(p) for p in Path(image_dir).iterdir()
+        if p.suffix.lower() in config.ALLOWED_EXTENSIONS
+    )
+
+
+def candidate_grid(args: argparse.Namespace, cpu_count: int) -> List[Dict[str, Any]]:
+    """
+    Build the list of settings to benchmark
+
+    Combinations whose executor workers times cpu_threads exceed the core
+    count are skipped, since they oversubscribe the CPU.
+    """
+    candidates = []
+    for threads, workers, mkldnn, side_len, batch in itertools.product(
+        args.threads, args.workers, args.mkldnn, args.side_len, args.batch
+    ):
+        if threads * workers > cpu_count:
+            continue
+        candidates.append({
+            "cpu_threads": threads,
+            "enable_mkldnn": mkldnn,
+            "executor_workers": workers,
+            "text_det_limit_side_len": side_len,
+            "text_rec_batch_size": batch,
+        })
+    return candidates
+
+
+def reference_settings(args: argparse.Namespace, cpu_count: int) -> Dict[str, Any]:
+    """Highest-fidelity settings, used as the accuracy baseline"""
+    return {
+        "cpu_threads": min(max(args.threads), cpu_count),
+        "enable_mkldnn": False,
+        "executor_workers": 1,
+        "text_det_limit_side_len": max(args.side_len),
+        "text_rec_batch_size": 1,
+    }
+
+
+def run_benchmark(settings: Dict[str, Any], images: List[str], repeats: int) -> Dict[str, Any]:
+    """
+    Benchmark one combination of settings
+
+    The model is shared by all executor threads, exactly like the API server.
+
+    Returns:
+        Dictionary with recognized texts per image and timing metrics
+    """
+    from paddleocr import PaddleOCR
+
+    model = PaddleOCR(**build_text_ocr_kwargs(settings))
+    model.ocr(images[0])  # Warm-up
+
+    def run_one(image_path: str):
+        start = time.perf_counter()
+        results = parse_text_ocr_result(model.ocr(image_path))
+        return image_path, [r.text for r in results], time.perf_counter() - start
+
+    jobs = images * repeats
+    texts: Dict[str, List[str]] = {}
+    latencies = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=settings["executor_workers"]) as pool:
+        for image_path, image_texts, latency in pool.map(run_one, jobs):
+            texts[image_path] = image_texts
+            latencies.append(latency)
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "texts": texts,
+        "throughput": len(jobs) / wall,
+        "latency_p50": statistics.median(latencies),
+        "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def text_accuracy(reference: Dict[str, List[str]], texts: Dict[str, List[str]]) -> float:
+    """Mean character-level similarity to the reference output (1.0 = identical)"""
+    ratios = [
+        SequenceMatcher(None, "\n".join(ref), "\n".join(texts.get(path, []))).ratio()
+        for path, ref in reference.items()
+    ]
+    return sum(ratios) / len(ratios) if ratios else 0.0
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        description="Benchmark CPU inference settings and write a performance profile",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--images", type=Path, default=config.BASE_DIR / "images",
+                        help="Directory with sample images")
+    parser.add_argument("--objective", choices=["throughput", "latency"], default="throughput",
+                        help="Optimize for images/second or median latency")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Maximum allowed accuracy loss versus the reference settings")
+    parser.add_argument("--threads", type=parse_int_list,
+                        default=sorted({1, 2, 4, max(1, cpu_count // 2), cpu_count}),
+                        help="Paddle cpu_threads candidates")
+    parser.add_argument("--workers", type=parse_int_list, default=[1, 2, 4],
+                        help="Executor worker candidates")
+    parser.add_argument("--mkldnn", type=parse_bool_list, default=[True, False],
+                        help="MKLDNN candidates (on,off)")
+    parser.add_argument("--side-len", type=parse_int_list, default=[736, 960],
+                        help="text_det_limit_side_len candidates")
+    parser.add_argument("--batch", type=parse_int_list, default=[1, 6],
+                        help="Recognition batch size candidates")
+    parser.add_argument("--repeats", type=int, default=2,
+                        help="Passes over the image set per candidate")
+    parser.add_argument("--output", type=Path, default=config.PERF_PROFILE_PATH,
+                        help="Where to write the profile")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print(f"❌ Error: No images found in {args.images}")
+        return
+
+    candidates = candidate_grid(args, cpu_count)
+    print("=" * 60)
+    print("CPU INFERENCE AUTOTUNER")
+    print("=" * 60)
+    print(f"🖥️ Cores: {cpu_count} | Images: {len(images)} | Candidates: {len(candidates)}")
+
+    print("\n📏 Running reference settings...")
+    reference = run_benchmark(reference_settings(args, cpu_count), images, repeats=1)["texts"]
+
+    measured = []
+    for i, settings in enumerate(candidates, 1):
+        try:
+            bench = run_benchmark(settings, images, args.repeats)
+        except Exception as e:
+            print(f"⚠️ [{i}/{len(candidates)}] {settings} failed: {e}")
+            continue
+        metrics = {
+            "throughput": round(bench["throughput"], 3),
+            "latency_p50": round(bench["latency_p50"], 4),
+            "latency_p95": round(bench["latency_p95"], 4),
+            "accuracy": round(text_accuracy(reference, bench["texts"]), 4),
+        }
+        measured.append({"settings": settings, "metrics": metrics})
+        print(f"[{i}/{len(candidates)}] {settings} -> {metrics}")
+
+    eligible = [m for m in measured if m["metrics"]["accuracy"] >= 1.0 - args.tolerance]
+    if not eligible:
+        print("❌ No candidate stayed within the accuracy tolerance; profile not written")
+        return
+
+    if args.objective == "throughput":
+        best = max(eligible, key=lambda m: m["metrics"]["throughput"])
+    else:
+        best = min(eligible, key=lambda m: m["metrics"]["latency_p50"])
+
+    profile = {
+        "device": "cpu",
+        "objective": args.objective,
+        "tolerance": args.tolerance,
+        "cpu_count": cpu_count,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": best["settings"],
+        "metrics": best["metrics"],
+        "candidates": measured,
+    }
+    output = save_perf_profile(profile, args.output)
+
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"🏆 Best ({args.objective}): {best['settings']}")
+    print(f"📊 Metrics: {best['metrics']}")
+    print(f"💾 Profile written to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,12 +35,74 @@ TEXT_OCR_CONFIG = {
     # lang='vi'
 }
 
+# Cascade recognition: every line is recognized by a fast mobile model first,
+# lines scoring below the threshold are re-recognized by the accurate model
+CASCADE_CONFIG = {
+    "enabled": False,
+    "score_threshold": 0.85,                          # Escalate lines scoring below this
+    "fast_model_name": "latin_PP-OCRv5_mobile_rec",   # First-pass recognizer
+    "fast_model_dir": None,                           # Optional local dir for the fast model
+    # Accurate recognizer; defaults to the one configured in TEXT_OCR_CONFIG
+    "accurate_model_name": None,
+    "accurate_model_dir": None,
+}
+
 # Table OCR settings (PPStructureV3)
 TABLE_OCR_CONFIG = {
-    "lang": "vi", 
-    "device": "gpu"
+    "lang": "vi",
+    # "device" is filled in from DEVICE by the service
 }
 
-# Output directory
+# CPU inference settings (overridden by the autotune profile, see autotune.py).
+# They are not used on GPU: Paddle's defaults and the default thread pool are kept.
+CPU_THREADS = max(1, (os.cpu_count() or 1) // 2)  # Paddle intra-op threads per model
+ENABLE_MKLDNN = True                               # oneDNN kernels on CPU
+EXECUTOR_WORKERS = 2                               # Threads used by run_in_executor for inference
+TEXT_DET_LIMIT_SIDE_LEN = 960                      # Max side length fed to the text detector
+TEXT_DET_LIMIT_TYPE = "max"                        # Cap the longest side (Paddle defaults to "min")
+TEXT_REC_BATCH_SIZE = 6                            # Text lines recognized per batch
+
+# Performance profile written by `python autotune.py`, applied at startup
+PERF_PROFILE_PATH = BASE_DIR / "perf_profile.json"
+
+# Streaming OCR over WebSocket (/ocr/stream)
+STREAM_MAX_PENDING_FRAMES = 2        # Frames buffered per connection; the oldest is dropped when full
+STREAM_THUMBNAIL_WIDTH = 160         # Width of the grayscale thumbnail used for change detection
+STREAM_PIXEL_THRESHOLD = 25          # Gray-level difference that marks a thumbnail pixel as changed
+STREAM_CHANGE_THRESHOLD = 0.0005     # Frames with a smaller changed-pixel fraction are skipped
+STREAM_MAX_REGION_FRACTION = 0.5     # Re-OCR the whole frame when changed regions cover more than this
+STREAM_REGION_PADDING = 16           # Pixels added around each changed region
+
+# Gateway mode: when backends are set, /ocr and /table are forwarded to them
+# instead of running models locally, e.g.
+#   OCR_GATEWAY_BACKENDS=http://127.0.0.1:8001,http://127.0.0.1:8002
+GATEWAY_BACKENDS = [u.strip() for u in os.environ.get("OCR_GATEWAY_BACKENDS", "").split(",") if u.strip()]
+GATEWAY_JOB_WEIGHTS = {"text": 1.0, "table": 4.0}  # Relative cost of a job when balancing
+GATEWAY_HEALTH_INTERVAL = 2.0      # Seconds between backend /health polls
+GATEWAY_MAX_ATTEMPTS = 3           # Backends tried per job before giving up
+GATEWAY_FAILURE_COOLDOWN = 10.0    # Seconds a failed backend is avoided
+GATEWAY_AFFINITY_SLACK = 4.0       # Extra weighted load tolerated on an image's affinity node
+GATEWAY_CONNECT_TIMEOUT = 2.0      # Seconds
+GATEWAY_REQUEST_TIMEOUT = 300.0    # Seconds (table jobs can be slow)
+
+# Output directory (created on first write, not at import)
 OUTPUT_DIR = BASE_DIR / "output"
-OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Request profiling (Server-Timing headers are always sent for /ocr and /table)
+SLOW_REQUEST_PROFILING = True                       # Sample stacks and keep profiles of slow requests
+SLOW_REQUEST_THRESHOLD_MS = 3000                    # Requests slower than this are profiled
+PROFILE_SAMPLE_INTERVAL_MS = 50                     # Stack sampling interval (20 Hz keeps the overhead low)
+PROFILE_MAX_RETAINED = 50                           # Oldest profiles beyond this are deleted
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+ADMIN_TOKEN = os.environ.get("OCR_ADMIN_TOKEN")     # Enables on-demand profiling (X-Profile + X-Admin-Token)
+
+# Result store: persist each request's results (texts, scores, polygons, timings)
+# to SQLite from a background writer; repeat images can be answered without inference
+RESULT_STORE_ENABLED = False
+RESULT_STORE_PATH = OUTPUT_DIR / "results.sqlite3"
+RESULT_STORE_QUEUE_SIZE = 1000                 # Pending records in memory; new ones are dropped when full
+RESULT_STORE_BATCH_SIZE = 100                  # Records per insert transaction
+RESULT_STORE_FLUSH_INTERVAL = 1.0              # Seconds before a partial batch is written
+RESULT_STORE_MAX_BYTES = 256 * 1024 * 1024     # Rotate the database file beyond this size
+RESULT_STORE_KEEP_ROTATED = 3                  # Rotated files kept (results.1.sqlite3, ...)
+RESULT_STORE_SERVE_CACHED = True               # Serve repeat images from the store
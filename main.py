@@ -2,12 +2,15 @@
 FastAPI OCR Application
 Main application file with CORS middleware and route registration
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import config
-from routes import ocr, table
+from profiling import server_timing_middleware
+from routes import ocr, table, stream, results
+from service import model_manager
 
 
 @asynccontextmanager
@@ -18,11 +21,29 @@ async def lifespan(app: FastAPI):
     print(f"📍 GPU Mode: {config.USE_GPU}")
     print(f"🌐 Language: {config.MODEL_LANG}")
     print(f"📁 Max Upload Size: {config.MAX_UPLOAD_SIZE / 1024 / 1024}MB")
+    if model_manager.executor is not None:
+        print(f"🧵 Executor workers: {config.EXECUTOR_WORKERS} | CPU threads: {config.CPU_THREADS}")
+    if config.CASCADE_CONFIG["enabled"]:
+        print(f"🪜 Cascade recognition: threshold {config.CASCADE_CONFIG['score_threshold']}")
+    if config.GATEWAY_BACKENDS:
+        from service.gateway import gateway_pool
+        print(f"🔀 Gateway mode: {len(config.GATEWAY_BACKENDS)} backends")
+        await gateway_pool.start()
+    elif config.RESULT_STORE_ENABLED:
+        from service.result_store import result_store
+        print(f"🗄️ Result store: {config.RESULT_STORE_PATH}")
+        result_store.start()
     print("✅ Server ready!")
     
     yield
     
     # Shutdown
+    if config.GATEWAY_BACKENDS:
+        await gateway_pool.stop()
+    elif config.RESULT_STORE_ENABLED:
+        # Flush queued records before exit, without blocking the event loop
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, result_store.stop)
     print("🛑 Shutting down PaddleOCR API Server...")
 
 
@@ -43,11 +64,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# Per-stage Server-Timing headers and slow-request profiling
+app.middleware("http")(server_timing_middleware)
+
 # Include routers
-app.include_router(ocr.router)
-app.include_router(table.router)
+if config.GATEWAY_BACKENDS:
+    # Gateway mode: forward jobs to backend instances, no local models
+    from routes import gateway
+    app.include_router(gateway.router)
+else:
+    app.include_router(ocr.router)
+    app.include_router(table.router)
+    app.include_router(stream.router)
+    app.include_router(results.router)
 
 
 @app.get("/")
@@ -59,6 +91,8 @@ async def root():
         "endpoints": {
             "text_ocr": "/ocr",
             "table_ocr": "/table",
+            "stream_ocr": "/ocr/stream (WebSocket)",
+            "stored_results": "/results/{image_hash}",
             "documentation": "/docs"
         }
     }
@@ -66,12 +100,24 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Global health check endpoint"""
-    return {
+    """Global health check endpoint (includes load, used by gateway mode)"""
+    if config.GATEWAY_BACKENDS:
+        from service.gateway import gateway_pool
+        return {
+            "status": "healthy",
+            "service": "paddleocr_gateway",
+            "backends": gateway_pool.snapshot()
+        }
+    health = {
         "status": "healthy",
         "service": "paddleocr_api",
-        "gpu_enabled": config.USE_GPU
+        "gpu_enabled": config.USE_GPU,
+        "load": model_manager.load_report()
     }
+    if config.RESULT_STORE_ENABLED:
+        from service.result_store import result_store
+        health["result_store"] = result_store.report()
+    return health
 
 
 # Global exception handler
@@ -4,7 +4,11 @@ from .results import *
 __all__ = [
     "OCRResponse",
     "TableOCRResponse",
+    "StoredResultsResponse",
     "OCRTextResult",
+    "OCRLine",
+    "OCRParagraph",
+    "StoredResult",
     "TableCell",
     "BoundingBox",
 ]
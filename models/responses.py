@@ -3,14 +3,19 @@ Pydantic models for request and response validation
 """
 from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
-from .results import OCRTextResult
+from .results import OCRTextResult, OCRLine, OCRParagraph, StoredResult
 class OCRResponse(BaseModel):
     """Response for text OCR endpoint"""
     success: bool = Field(..., description="Whether OCR was successful")
     message: str = Field(..., description="Status message")
-    context: str = Field("", description="Complete text content from all detections")
+    context: str = Field("", description="Complete text content in reading order, one line per row")
     results: List[OCRTextResult] = Field(default_factory=list, description="List of detected texts")
+    lines: List[OCRLine] = Field(default_factory=list, description="Text lines in reading order")
+    paragraphs: List[OCRParagraph] = Field(default_factory=list, description="Paragraphs in reading order")
     total_detections: int = Field(0, description="Total number of text detections")
+    escalated_lines: int = Field(0, description="Lines re-recognized by the accurate model (cascade mode)")
+    image_hash: Optional[str] = Field(None, description="SHA-256 of the image (when the result store is enabled)")
+    from_store: bool = Field(False, description="Served from the result store without running inference")
 
 
 class TableCell(BaseModel):
@@ -27,3 +32,13 @@ class TableOCRResponse(BaseModel):
     format: Literal["markdown", "text"] = Field(..., description="Output format")
     content: str = Field(..., description="Table content in requested format")
     raw_result: Optional[dict] = Field(None, description="Raw OCR result from PPStructureV3")
+    image_hash: Optional[str] = Field(None, description="SHA-256 of the image (when the result store is enabled)")
+    from_store: bool = Field(False, description="Served from the result store without running inference")
+
+
+class StoredResultsResponse(BaseModel):
+    """Response for the stored results query endpoint"""
+    success: bool = Field(..., description="Whether the lookup was successful")
+    message: str = Field(..., description="Status message")
+    image_hash: str = Field(..., description="SHA-256 of the image")
+    results: List[StoredResult] = Field(default_factory=list, description="Stored results, newest first")
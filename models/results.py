@@ -13,4 +13,34 @@ class OCRTextResult(BaseModel):
     """Single OCR text detection result"""
     text: str = Field(..., description="Detected text")
     confidence: float = Field(..., description="Confidence score (0-1)")
-    bounding_box: Optional[BoundingBox] = Field(None, description="Bounding box coordinates")
\ No newline at end of file
+    bounding_box: Optional[BoundingBox] = Field(None, description="Bounding box coordinates")
+
+
+class OCRLine(BaseModel):
+    """Text line assembled from detections in reading order"""
+    text: str = Field(..., description="Line text (detections joined left to right)")
+    confidence: float = Field(..., description="Mean confidence of the line's detections")
+    bounding_box: BoundingBox = Field(..., description="Axis-aligned box enclosing the line")
+    column: int = Field(0, description="Column index within its band (0 = leftmost)")
+    result_indices: List[int] = Field(..., description="Indices into `results`, left to right")
+
+
+class OCRParagraph(BaseModel):
+    """Paragraph assembled from consecutive lines of one column"""
+    text: str = Field(..., description="Paragraph text (lines joined with spaces)")
+    bounding_box: BoundingBox = Field(..., description="Axis-aligned box enclosing the paragraph")
+    column: int = Field(0, description="Column index within its band (0 = leftmost)")
+    line_indices: List[int] = Field(..., description="Indices into `lines`, top to bottom")
+
+
+class StoredResult(BaseModel):
+    """OCR result persisted by the result store"""
+    image_hash: str = Field(..., description="SHA-256 of the image bytes")
+    endpoint: Literal["ocr", "table"] = Field(..., description="Endpoint that produced the result")
+    params: dict = Field(default_factory=dict, description="Request options (e.g. table format)")
+    created_at: float = Field(..., description="Unix timestamp")
+    texts: Optional[List[str]] = Field(None, description="Detected texts (text OCR)")
+    scores: Optional[List[float]] = Field(None, description="Confidence scores (text OCR)")
+    polygons: Optional[List[List[List[float]]]] = Field(None, description="Bounding polygons (text OCR)")
+    content: Optional[str] = Field(None, description="Rendered table content (table OCR)")
+    timings: dict = Field(default_factory=dict, description="Per-stage durations in ms")
@@ -0,0 +1,260 @@
+"""
+Per-request stage timing (Server-Timing) and sampled slow-request profiling
+"""
+import asyncio
+import hmac
+import itertools
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Iterator, Set, Tuple
+from fastapi import Request
+from fastapi.responses import JSONResponse
+import config
+
+# Endpoints that get Server-Timing headers and can be profiled
+PROFILED_PATHS = ("/ocr", "/table")
+
+
+class RequestTimer:
+    """
+    Collects per-stage durations (in milliseconds) for one request
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # Threads currently working for this request; the profiler samples only these
+        self.threads: Set[int] = set()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as stage `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        """Add a duration to a stage (repeated stages accumulate)"""
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing_header(self) -> str:
+        """Format the stages as a Server-Timing header value"""
+        parts = [f"{name};dur={duration:.1f}" for name, duration in self.stages.items()]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+def get_request_timer(request: Request) -> RequestTimer:
+    """
+    Get the timer attached to a request, creating one if needed
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        RequestTimer shared by the middleware and the route
+    """
+    timer = getattr(request.state, "timer", None)
+    if timer is None:
+        timer = RequestTimer()
+        request.state.timer = timer
+    return timer
+
+
+class StackSampler:
+    """
+    Process-wide sampling profiler shared by all profiled requests
+
+    One daemon thread snapshots thread stacks with sys._current_frames()
+    while at least one session is open. Each session only receives the
+    stacks of its own threads: the executor threads running its OCR job
+    (inference, parsing, layout; see RequestTimer.threads). The event
+    loop thread is shared by all requests and is not sampled, so
+    concurrent requests do not show up in each other's profiles; the
+    loop-side stages (validation, temp_file...) are timed in Server-Timing.
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self._sessions: Dict[int, Tuple[Set[int], Counter]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start_session(self, threads: Set[int]) -> int:
+        """
+        Start collecting samples
+
+        Args:
+            threads: Idents of the threads to sample; the set may change while
+                the session is open
+
+        Returns:
+            Session id
+        """
+        with self._lock:
+            session_id = next(self._ids)
+            self._sessions[session_id] = (threads, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return session_id
+
+    def stop_session(self, session_id: int) -> Counter:
+        """Stop a session and return its collapsed stack counts"""
+        with self._lock:
+            return self._sessions.pop(session_id, (set(), Counter()))[1]
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._sessions:
+                    self._wake.clear()
+                    continue
+                # Copy the sets: executor threads add and remove themselves concurrently
+                sessions = [(frozenset(threads), counter) for threads, counter in self._sessions.values()]
+
+            wanted = frozenset().union(*(threads for threads, _ in sessions))
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = {
+                ident: self._collapse(names.get(ident, str(ident)), frames[ident])
+                for ident in wanted if ident in frames
+            }
+            del frames
+            with self._lock:
+                for threads, counter in sessions:
+                    counter.update(stacks[ident] for ident in threads if ident in stacks)
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        """Format a stack as `thread;outer;...;inner` (flamegraph folded format)"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+
+class ProfileStore:
+    """
+    Writes captured profiles to disk and keeps at most `max_profiles` of them
+    """
+
+    def __init__(self, directory: Path, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def save(self, path: str, duration_ms: float, stages: Dict[str, float], samples: Counter) -> str:
+        """
+        Save a profile and prune the oldest ones beyond the cap
+
+        Returns:
+            Profile id (file name without extension)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = "{}-{}-{}ms-{}".format(
+            time.strftime("%Y%m%d-%H%M%S"),
+            path.strip("/").replace("/", "_") or "root",
+            int(duration_ms),
+            uuid.uuid4().hex[:6],
+        )
+        profile = {
+            "id": profile_id,
+            "path": path,
+            "duration_ms": round(duration_ms, 1),
+            "stages": {name: round(ms, 1) for name, ms in stages.items()},
+            "sample_interval_ms": config.PROFILE_SAMPLE_INTERVAL_MS,
+            "samples": dict(samples.most_common()),
+        }
+        with open(self.directory / f"{profile_id}.json", "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False)
+        self._prune()
+        return profile_id
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass  # Ignore cleanup errors
+
+
+# Global instances
+sampler = StackSampler(config.PROFILE_SAMPLE_INTERVAL_MS)
+profile_store = ProfileStore(config.PROFILE_DIR, config.PROFILE_MAX_RETAINED)
+
+
+def _profile_requested(request: Request) -> bool:
+    """Whether the client asked for an on-demand profile"""
+    return request.headers.get("x-profile", "").lower() in ("1", "true", "yes")
+
+
+def _admin_token_valid(request: Request) -> bool:
+    """Check the X-Admin-Token header against config.ADMIN_TOKEN"""
+    token = request.headers.get("x-admin-token", "")
+    return bool(config.ADMIN_TOKEN) and hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode())
+
+
+async def server_timing_middleware(request: Request, call_next):
+    """
+    Add Server-Timing headers and capture profiles for slow or flagged requests
+
+    A profile is stored under config.PROFILE_DIR when the request is slower
+    than config.SLOW_REQUEST_THRESHOLD_MS, or when it carries `X-Profile: 1`
+    together with a valid `X-Admin-Token`. The profile id is returned in
+    the `X-Profile-Id` header.
+    """
+    path = request.url.path
+    if not path.startswith(PROFILED_PATHS):
+        return await call_next(request)
+
+    on_demand = _profile_requested(request)
+    if on_demand and not _admin_token_valid(request):
+        return JSONResponse(
+            status_code=403,
+            content={"success": False, "message": "Invalid or missing admin token for profiling"}
+        )
+
+    timer = get_request_timer(request)
+    session_id = None
+    if on_demand or config.SLOW_REQUEST_PROFILING:
+        # Executor threads add themselves to timer.threads while they work for the request
+        session_id = sampler.start_session(timer.threads)
+
+    try:
+        response = await call_next(request)
+    finally:
+        samples = sampler.stop_session(session_id) if session_id is not None else None
+
+    duration_ms = timer.total_ms
+    response.headers["Server-Timing"] = timer.server_timing_header()
+
+    if samples is not None and (on_demand or duration_ms >= config.SLOW_REQUEST_THRESHOLD_MS):
+        loop = asyncio.get_event_loop()
+        profile_id = await loop.run_in_executor(
+            None,
+            lambda: profile_store.save(path, duration_ms, timer.stages, samples)
+        )
+        response.headers["X-Profile-Id"] = profile_id
+
+    return response
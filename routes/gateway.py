@@ -0,0 +1,76 @@
+"""
+Gateway endpoints: forward OCR jobs to backend instances
+"""
+from typing import Literal
+from fastapi import APIRouter, Request, UploadFile, File, HTTPException, Query
+from fastapi.responses import Response
+from models import OCRResponse, TableOCRResponse
+from profiling import get_request_timer
+from service.gateway import gateway_pool, GatewayError, FORWARDED_HEADERS
+from utils import validate_image
+
+router = APIRouter(tags=["Gateway"])
+
+
+async def _forward(request: Request, file: UploadFile, kind: str, path: str, params: dict) -> Response:
+    """Validate the upload and forward it to the best backend"""
+    timer = get_request_timer(request)
+
+    with timer.stage("validation"):
+        await validate_image(file)
+        content = await file.read()
+
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    try:
+        with timer.stage("upstream"):
+            backend, response = await gateway_pool.forward(
+                kind, path, file.filename, content, file.content_type, params, headers
+            )
+    except GatewayError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"All OCR backends failed: {str(e)}"
+        )
+
+    passthrough = {"X-Backend": backend.url}
+    if "server-timing" in response.headers:
+        # The gateway sends its own Server-Timing; keep the backend's alongside
+        passthrough["X-Backend-Server-Timing"] = response.headers["server-timing"]
+    if "x-profile-id" in response.headers:
+        passthrough["X-Profile-Id"] = response.headers["x-profile-id"]
+
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json"),
+        headers=passthrough
+    )
+
+
+@router.post("/ocr", response_model=OCRResponse)
+async def gateway_ocr_text(
+    request: Request,
+    file: UploadFile = File(..., description="Image file to perform OCR on")
+):
+    """
+    Forward text OCR to the least loaded backend (see POST /ocr on a backend)
+    """
+    return await _forward(request, file, "text", "/ocr", {})
+
+
+@router.post("/table", response_model=TableOCRResponse)
+async def gateway_ocr_table(
+    request: Request,
+    file: UploadFile = File(..., description="Image file containing table to perform OCR on"),
+    format: Literal["markdown", "text"] = Query("markdown", description="Output format (markdown or text)")
+):
+    """
+    Forward table OCR to the least loaded backend (see POST /table on a backend)
+    """
+    return await _forward(request, file, "table", "/table", {"format": format})
+
+
+@router.get("/gateway/backends")
+async def gateway_backends():
+    """Health and load of every backend as seen by the gateway"""
+    return {"backends": gateway_pool.snapshot()}
@@ -1,44 +1,95 @@
 """
 Text OCR endpoint
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from models import OCRResponse, OCRTextResult
-from service import process_text_ocr
-from utils import validate_image, save_upload_file_tmp, cleanup_temp_file
+import asyncio
+from fastapi import APIRouter, Request, UploadFile, File, HTTPException
+import config
+from models import OCRResponse
+from service import process_text_ocr, rebuild_text_ocr, model_fingerprint
+from service.result_store import result_store
+from profiling import get_request_timer
+from utils import validate_image, save_upload_file_tmp, cleanup_temp_file, hash_upload_file
 
 router = APIRouter(prefix="/ocr", tags=["Text OCR"])
 
 
 @router.post("", response_model=OCRResponse)
-async def ocr_text(file: UploadFile = File(..., description="Image file to perform OCR on")):
+async def ocr_text(
+    request: Request,
+    file: UploadFile = File(..., description="Image file to perform OCR on")
+):
     """
     Perform text OCR on uploaded image
     
     - **file**: Image file (jpg, png, bmp, tiff, webp)
     
-    Returns detected text with bounding boxes and confidence scores
+    Returns detected text with bounding boxes and confidence scores, plus
+    lines and paragraphs in reading order
+    
+    With the result store enabled, an image seen before is answered from
+    the store without running OCR (`from_store` is true)
     """
     temp_file_path = None
+    image_hash = None
+    timer = get_request_timer(request)
     
     try:
         # Validate image
-        await validate_image(file)
-        
-        # Save to temporary file
-        temp_file_path = await save_upload_file_tmp(file)
+        with timer.stage("validation"):
+            await validate_image(file)
         
-        # Process OCR
-        results = await process_text_ocr(temp_file_path)
+        # Answer repeat images from the result store (only results produced
+        # by the current model settings)
+        stored = None
+        params = {"models": model_fingerprint("ocr")}
+        if config.RESULT_STORE_ENABLED:
+            with timer.stage("store"):
+                image_hash = await hash_upload_file(file)
+                if config.RESULT_STORE_SERVE_CACHED:
+                    loop = asyncio.get_event_loop()
+                    try:
+                        records = await loop.run_in_executor(
+                            None, lambda: result_store.lookup(image_hash, "ocr", params, limit=1)
+                        )
+                    except Exception as e:
+                        # A broken store must not fail OCR; run inference instead
+                        print(f"⚠️ Result store lookup failed: {e}")
+                        records = []
+                    if records:
+                        record = records[0]
+                        stored = rebuild_text_ocr(record["texts"], record["scores"], record["polygons"])
         
-        # Combine all text into full context
-        full_text = "\n".join([r.text for r in results])
+        if stored is not None:
+            result = stored
+        else:
+            # Save to temporary file
+            with timer.stage("temp_file"):
+                temp_file_path = await save_upload_file_tmp(file)
+            
+            # Process OCR (context, lines and paragraphs come back in reading order)
+            result = await process_text_ocr(temp_file_path, timer=timer)
+            
+            if config.RESULT_STORE_ENABLED:
+                # Queued for the background writer; never waits on disk
+                result_store.submit(
+                    image_hash, "ocr", params=params,
+                    texts=[r.text for r in result["results"]],
+                    scores=[r.confidence for r in result["results"]],
+                    polygons=[r.bounding_box.points if r.bounding_box else [] for r in result["results"]],
+                    timings=timer.stages
+                )
         
         return OCRResponse(
             success=True,
-            message="OCR completed successfully",
-            context=full_text,
-            results=results,
-            total_detections=len(results)
+            message="OCR result loaded from store" if stored is not None else "OCR completed successfully",
+            context=result["context"],
+            results=result["results"],
+            lines=result["lines"],
+            paragraphs=result["paragraphs"],
+            total_detections=len(result["results"]),
+            escalated_lines=result["escalated_lines"],
+            image_hash=image_hash,
+            from_store=stored is not None
         )
         
     except HTTPException:
@@ -51,4 +102,5 @@ async def ocr_text(file: UploadFile = File(..., description="Image file to perfo
     finally:
         # Cleanup temporary file
         if temp_file_path:
-            cleanup_temp_file(temp_file_path)
+            with timer.stage("temp_file"):
+                cleanup_temp_file(temp_file_path)
@@ -0,0 +1,49 @@
+"""
+Stored results endpoint (result store)
+"""
+import asyncio
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+import config
+from models import StoredResultsResponse
+from service.result_store import result_store
+
+router = APIRouter(prefix="/results", tags=["Results"])
+
+
+@router.get("/{image_hash}", response_model=StoredResultsResponse)
+async def get_results(
+    image_hash: str,
+    endpoint: Optional[Literal["ocr", "table"]] = Query(None, description="Only results of this endpoint"),
+    limit: int = Query(20, ge=1, le=500, description="Maximum number of results")
+):
+    """
+    Return past OCR results for an image, newest first
+    
+    - **image_hash**: SHA-256 of the image bytes (returned as `image_hash` by /ocr and /table)
+    - **endpoint**: Optional filter ("ocr" or "table")
+    
+    Reads the result store only; no inference is run
+    """
+    if not config.RESULT_STORE_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Result store is disabled"
+        )
+    
+    loop = asyncio.get_event_loop()
+    records = await loop.run_in_executor(
+        None, lambda: result_store.lookup(image_hash.lower(), endpoint, limit=limit)
+    )
+    if not records:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No stored results for image {image_hash}"
+        )
+    
+    return StoredResultsResponse(
+        success=True,
+        message=f"Found {len(records)} stored results",
+        image_hash=image_hash.lower(),
+        results=records
+    )
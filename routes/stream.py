@@ -0,0 +1,151 @@
+"""
+Streaming text OCR endpoint (WebSocket)
+"""
+import asyncio
+from typing import Optional, Tuple
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import config
+from profiling import RequestTimer
+from service import process_frame_regions
+
+router = APIRouter(prefix="/ocr", tags=["Streaming OCR"])
+
+
+class FrameBuffer:
+    """
+    Bounded per-connection frame queue that drops the oldest frame when full
+
+    Under load the client keeps sending while OCR is busy; only the newest
+    frames are worth recognizing, so stale ones are discarded.
+    """
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item: Optional[Tuple[int, bytes]]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    async def get(self) -> Optional[Tuple[int, bytes]]:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        """Mark the stream as finished; pending frames are abandoned"""
+        self.closed = True
+        self.put(None)
+
+
+async def _receive_frames(websocket: WebSocket, buffer: FrameBuffer) -> None:
+    """Read binary frames from the client into the buffer; None marks the end"""
+    frame_id = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if not data or len(data) > config.MAX_UPLOAD_SIZE:
+                continue  # Text messages and oversized frames are ignored
+            frame_id += 1
+            buffer.put((frame_id, data))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        buffer.close()
+
+
+@router.websocket("/stream")
+async def ocr_stream(websocket: WebSocket):
+    """
+    Perform text OCR on a stream of frames (video, camera, screen capture)
+
+    The client sends each frame as a binary message containing an encoded
+    image (JPEG, PNG, WebP...). Frames are decoded in memory and compared
+    with the last processed frame on a downscaled thumbnail:
+
+    - unchanged frames are skipped: `{"type": "skip", "frame": n, ...}`
+    - partially changed frames are re-recognized only in the changed regions
+    - otherwise the whole frame is recognized
+
+    After each processed frame the server sends the text diff:
+    `{"type": "diff", "frame": n, "mode": "full" | "regions", "added": [...], "removed": [...],
+    "escalated_lines": k}` (lines re-recognized by the accurate model in cascade mode)
+
+    At most `STREAM_MAX_PENDING_FRAMES` frames are buffered per connection;
+    older frames are dropped under load (counted in `dropped`).
+    """
+    # Imported here so that cv2/numpy stay out of application startup
+    from service.stream import FrameChangeDetector, StreamTextState, decode_frame, regions_too_large
+
+    await websocket.accept()
+    buffer = FrameBuffer(config.STREAM_MAX_PENDING_FRAMES)
+    receiver = asyncio.create_task(_receive_frames(websocket, buffer))
+    detector = FrameChangeDetector()
+    state = StreamTextState()
+    loop = asyncio.get_event_loop()
+
+    def decode_and_compare(data: bytes):
+        frame = decode_frame(data)
+        if frame is None:
+            return None, None, None
+        change, thumb = detector.compare(frame)
+        return frame, change, thumb
+
+    try:
+        while True:
+            item = await buffer.get()
+            if item is None or buffer.closed:
+                break
+            frame_id, data = item
+            timer = RequestTimer()
+
+            with timer.stage("decode"):
+                frame, change, thumb = await loop.run_in_executor(None, decode_and_compare, data)
+            if frame is None:
+                await websocket.send_json({"type": "error", "frame": frame_id, "message": "Invalid image frame"})
+                continue
+
+            if change.kind == "skip":
+                await websocket.send_json({
+                    "type": "skip",
+                    "frame": frame_id,
+                    "changed": round(change.changed, 5),
+                    "dropped": buffer.dropped,
+                })
+                continue
+
+            regions = change.regions
+            if change.kind == "regions":
+                regions = state.expand_regions(regions)
+                height, width = frame.shape[:2]
+                if regions_too_large(regions, width, height):
+                    change = change._replace(kind="full")
+                    regions = [(0, 0, width, height)]
+
+            try:
+                processed = await process_frame_regions(frame, regions, timer=timer)
+            except Exception as e:
+                await websocket.send_json({"type": "error", "frame": frame_id, "message": f"OCR failed: {str(e)}"})
+                continue
+
+            diff = state.update(processed["results"], regions if change.kind == "regions" else None)
+            detector.commit(frame, thumb)
+
+            await websocket.send_json({
+                "type": "diff",
+                "frame": frame_id,
+                "mode": change.kind,
+                "regions": [list(r) for r in regions],
+                **diff,
+                "escalated_lines": processed["escalated_lines"],
+                "dropped": buffer.dropped,
+                "timing_ms": {name: round(ms, 1) for name, ms in timer.stages.items()},
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
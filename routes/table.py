@@ -1,17 +1,22 @@
 """
 Table OCR endpoint
 """
+import asyncio
 from typing import Literal
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi import APIRouter, Request, UploadFile, File, HTTPException, Query
+import config
 from models import TableOCRResponse
-from service import process_table_ocr
-from utils import validate_image, save_upload_file_tmp, cleanup_temp_file
+from service import process_table_ocr, model_fingerprint
+from service.result_store import result_store
+from profiling import get_request_timer
+from utils import validate_image, save_upload_file_tmp, cleanup_temp_file, hash_upload_file
 
 router = APIRouter(prefix="/table", tags=["Table OCR"])
 
 
 @router.post("", response_model=TableOCRResponse)
 async def ocr_table(
+    request: Request,
     file: UploadFile = File(..., description="Image file containing table to perform OCR on"),
     format: Literal["markdown", "text"] = Query("markdown", description="Output format (markdown or text)")
 ):
@@ -22,25 +27,66 @@ async def ocr_table(
     - **format**: Output format - "markdown" for markdown table or "text" for plain text
     
     Returns table content in requested format
+    
+    With the result store enabled, an image seen before (in the same format)
+    is answered from the store without running OCR (`from_store` is true,
+    `raw_result` is not stored)
     """
     temp_file_path = None
+    image_hash = None
+    timer = get_request_timer(request)
     
     try:
         # Validate image
-        await validate_image(file)
+        with timer.stage("validation"):
+            await validate_image(file)
         
-        # Save to temporary file
-        temp_file_path = await save_upload_file_tmp(file)
+        # Answer repeat images from the result store (only results produced
+        # by the current model settings)
+        stored = None
+        params = {"format": format, "models": model_fingerprint("table")}
+        if config.RESULT_STORE_ENABLED:
+            with timer.stage("store"):
+                image_hash = await hash_upload_file(file)
+                if config.RESULT_STORE_SERVE_CACHED:
+                    loop = asyncio.get_event_loop()
+                    try:
+                        records = await loop.run_in_executor(
+                            None, lambda: result_store.lookup(image_hash, "table", params, limit=1)
+                        )
+                    except Exception as e:
+                        # A broken store must not fail OCR; run inference instead
+                        print(f"⚠️ Result store lookup failed: {e}")
+                        records = []
+                    if records:
+                        stored = {"format": format, "content": records[0]["content"], "raw_result": None}
         
-        # Process table OCR
-        result = await process_table_ocr(temp_file_path, output_format=format)
+        if stored is not None:
+            result = stored
+        else:
+            # Save to temporary file
+            with timer.stage("temp_file"):
+                temp_file_path = await save_upload_file_tmp(file)
+            
+            # Process table OCR
+            result = await process_table_ocr(temp_file_path, output_format=format, timer=timer)
+            
+            if config.RESULT_STORE_ENABLED:
+                # Queued for the background writer; never waits on disk
+                result_store.submit(
+                    image_hash, "table", params=params,
+                    content=result["content"],
+                    timings=timer.stages
+                )
         
         return TableOCRResponse(
             success=True,
-            message="Table OCR completed successfully",
+            message="Table result loaded from store" if stored is not None else "Table OCR completed successfully",
             format=result["format"],
             content=result["content"],
-            raw_result=result["raw_result"]
+            raw_result=result["raw_result"],
+            image_hash=image_hash,
+            from_store=stored is not None
         )
         
     except HTTPException:
@@ -53,4 +99,5 @@ async def ocr_table(
     finally:
         # Cleanup temporary file
         if temp_file_path:
-            cleanup_temp_file(temp_file_path)
\ No newline at end of file
+            with timer.stage("temp_file"):
+                cleanup_temp_file(temp_file_path)
\ No newline at end of file
@@ -1,4 +1,15 @@
 from .ocr_service import *
 __all__ = [
-    "OCRService",
+    "OCRModelManager",
+    "model_manager",
+    "build_text_ocr_kwargs",
+    "build_table_ocr_kwargs",
+    "build_cascade_rec_kwargs",
+    "model_fingerprint",
+    "parse_text_ocr_result",
+    "assemble_text_layout",
+    "rebuild_text_ocr",
+    "process_text_ocr",
+    "process_table_ocr",
+    "process_frame_regions",
 ]
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Cascade recognition: re-recognize low-confidence lines with an accurate model
+
+The text OCR pipeline runs with a fast (mobile) recognizer. Lines whose
+score falls below the cascade threshold are cropped from the image and
+recognized again by the slower, more accurate recognizer; the better of
+the two readings is kept. Crops get the same 180-degree turn the
+pipeline's textline orientation classifier applied to them.
+"""
+from typing import Any, List
+import cv2
+import numpy as np
+
+
+def crop_text_line(image: np.ndarray, poly: Any) -> np.ndarray:
+    """
+    Crop a text line from the image, rectified to a horizontal strip
+
+    Args:
+        image: Image the polygon coordinates refer to (BGR)
+        poly: Quadrilateral [[x, y] * 4] clockwise from top-left, or any polygon
+
+    Returns:
+        Cropped line image
+    """
+    points = np.asarray(poly, dtype=np.float32).reshape(-1, 2)
+    if len(points) != 4:
+        # Curved or irregular polygon: fall back to its bounding rectangle
+        x, y, w, h = cv2.boundingRect(points)
+        return image[y:y + h, x:x + w]
+
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    width, height = max(width, 1), max(height, 1)
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    crop = cv2.warpPerspective(
+        image,
+        cv2.getPerspectiveTransform(points, target),
+        (width, height),
+        borderMode=cv2.BORDER_REPLICATE,
+        flags=cv2.INTER_CUBIC
+    )
+    # Vertical text lines are rotated so the recognizer reads them horizontally
+    if height / width >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+def _source_image(first_result: dict, image: Any) -> np.ndarray:
+    """
+    Image that rec_polys refer to
+
+    When orientation classification or unwarping ran, polygons refer to the
+    preprocessed image rather than the original file.
+    """
+    preprocessed = (first_result.get('doc_preprocessor_res') or {}).get('output_img')
+    if preprocessed is not None:
+        return preprocessed
+    if isinstance(image, np.ndarray):
+        return image
+    return cv2.imread(str(image))
+
+
+def _upside_down_lines(first_result: dict) -> List[bool]:
+    """
+    Per rec_polys line, whether the pipeline's textline orientation step
+    turned it by 180 degrees before recognition
+
+    textline_orientation_angles follows dt_polys (0 = upright, 1 = 180
+    degrees, -1 = not classified); rec_polys is the subset of dt_polys that
+    passed the recognition score filter, in the same order.
+    """
+    rec_polys = first_result.get('rec_polys', [])
+    angles = first_result.get('textline_orientation_angles')
+    if angles is None or len(angles) == 0:
+        return [False] * len(rec_polys)
+    dt_polys = first_result.get('dt_polys')
+    if len(angles) == len(rec_polys) or dt_polys is None:
+        return [i < len(angles) and int(angles[i]) == 1 for i in range(len(rec_polys))]
+
+    # Some lines were filtered out: walk dt_polys to find each kept line
+    flipped, j = [], 0
+    for poly in rec_polys:
+        while j < len(dt_polys) and not np.array_equal(dt_polys[j], poly):
+            j += 1
+        flipped.append(j < len(angles) and int(angles[j]) == 1)
+        j += 1
+    return flipped
+
+
+def escalate_low_confidence(result: Any, image: Any, recognizer: Any,
+                            threshold: float, batch_size: int = 1) -> int:
+    """
+    Re-recognize lines scoring below `threshold` and merge the results in place
+
+    Args:
+        result: Raw PaddleOCR output (new dict format with rec_texts/rec_scores/rec_polys)
+        image: Image path or array that was passed to the pipeline
+        recognizer: paddleocr.TextRecognition instance (accurate model)
+        threshold: Score below which a line is escalated
+        batch_size: Recognition batch size for the accurate model
+
+    Returns:
+        Number of lines escalated
+    """
+    if not result or not isinstance(result[0], dict):
+        return 0
+    first_result = result[0]
+    rec_texts = first_result.get('rec_texts', [])
+    rec_scores = first_result.get('rec_scores', [])
+    rec_polys = first_result.get('rec_polys', [])
+
+    low = [
+        i for i in range(min(len(rec_texts), len(rec_scores), len(rec_polys)))
+        if float(rec_scores[i]) < threshold
+    ]
+    if not low:
+        return 0
+
+    source = _source_image(first_result, image)
+    if source is None:
+        return 0
+    crops: List[np.ndarray] = [crop_text_line(source, rec_polys[i]) for i in low]
+    # Turn lines the pipeline read upside down the same way, or the accurate
+    # model gets exactly the low-score lines in the wrong orientation
+    upside_down = _upside_down_lines(first_result)
+    crops = [
+        cv2.rotate(crop, cv2.ROTATE_180) if upside_down[i] else crop
+        for i, crop in zip(low, crops)
+    ]
+
+    for i, rec in zip(low, recognizer.predict(input=crops, batch_size=batch_size)):
+        # Keep whichever reading the models are more confident about
+        if float(rec['rec_score']) > float(rec_scores[i]):
+            rec_texts[i] = rec['rec_text']
+            rec_scores[i] = float(rec['rec_score'])
+    return len(low)
@@ -0,0 +1,232 @@
+"""
+Gateway mode: load-aware dispatch of OCR jobs to backend instances
+
+Backends are ordinary instances of this app. The gateway polls each
+backend's /health for its reported load and sends every job to the node
+with the least outstanding work, weighting table jobs more heavily than
+text jobs. Identical images prefer the same node (rendezvous hashing on
+the image hash) so that backend-side caches stay warm, as long as that
+node is not much busier than the least loaded one.
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Set, Tuple
+import httpx
+import config
+
+# Backend answers that mean "try another node"
+RETRY_STATUSES = {502, 503, 504}
+
+# Request headers passed through to the backend
+FORWARDED_HEADERS = ("x-profile", "x-admin-token")
+
+
+class GatewayError(Exception):
+    """Raised when no backend could process a job"""
+
+
+@dataclass
+class Backend:
+    """A backend instance and what the gateway knows about its load"""
+    url: str
+    outstanding: Dict[str, int] = field(default_factory=lambda: {"text": 0, "table": 0})
+    reported: Dict[str, int] = field(default_factory=lambda: {"text": 0, "table": 0})
+    workers: int = 1
+    healthy: bool = True
+    failed_until: float = 0.0
+    last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.failed_until
+
+    def load(self) -> float:
+        """
+        Weighted outstanding work per inference worker (as reported by the
+        backend: executor size on CPU, 1 on GPU)
+
+        Jobs sent by this gateway are counted exactly; the backend's own
+        report also includes other clients, so the larger of the two wins.
+        """
+        weights = config.GATEWAY_JOB_WEIGHTS
+        work = sum(
+            weights[kind] * max(self.outstanding[kind], self.reported[kind])
+            for kind in weights
+        )
+        return work / max(1, self.workers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.available(time.monotonic()),
+            "load": round(self.load(), 2),
+            "outstanding": dict(self.outstanding),
+            "reported": dict(self.reported),
+            "workers": self.workers,
+            "last_error": self.last_error,
+        }
+
+
+def _affinity_score(image_hash: str, url: str) -> int:
+    """Rendezvous hash score of a backend for an image"""
+    return int.from_bytes(hashlib.blake2b(f"{image_hash}|{url}".encode(), digest_size=8).digest(), "big")
+
+
+class BackendPool:
+    """
+    Set of OCR backends with health polling, load-aware selection and retries
+    """
+
+    def __init__(self, urls: List[str]):
+        self.backends = [Backend(url=url.rstrip("/")) for url in urls]
+        self._client: Optional[httpx.AsyncClient] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(config.GATEWAY_REQUEST_TIMEOUT, connect=config.GATEWAY_CONNECT_TIMEOUT)
+            )
+        return self._client
+
+    async def start(self) -> None:
+        """Poll backend health once, then keep polling in the background"""
+        await self.poll_health()
+        self._poller = asyncio.create_task(self._poll_forever())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await asyncio.sleep(config.GATEWAY_HEALTH_INTERVAL)
+            try:
+                await self.poll_health()
+            except Exception as e:
+                # Keep polling: stale health info would freeze load balancing
+                print(f"⚠️ Gateway health poll failed: {e!r}")
+
+    async def poll_health(self) -> None:
+        """Refresh health and reported load of every backend"""
+        await asyncio.gather(*(self._poll_backend(b) for b in self.backends))
+
+    async def _poll_backend(self, backend: Backend) -> None:
+        try:
+            response = await self.client.get(f"{backend.url}/health", timeout=config.GATEWAY_CONNECT_TIMEOUT)
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError(f"unexpected /health body: {data!r:.100}")
+            load = data.get("load") or {}
+            reported = {"text": int(load.get("text_jobs", 0)), "table": int(load.get("table_jobs", 0))}
+            workers = max(1, int(load.get("inference_workers", backend.workers)))
+        except Exception as e:
+            # Any failure (network, bad JSON, unexpected payload) only affects this backend
+            backend.healthy = False
+            backend.last_error = f"health check failed: {e!r}"
+            return
+
+        backend.healthy = response.status_code == 200 and data.get("status") == "healthy"
+        backend.reported = reported
+        backend.workers = workers
+        if backend.healthy:
+            backend.last_error = None
+
+    def _mark_failed(self, backend: Backend, error: str) -> None:
+        backend.failed_until = time.monotonic() + config.GATEWAY_FAILURE_COOLDOWN
+        backend.last_error = error
+
+    def choose(self, kind: str, image_hash: str, exclude: Set[str]) -> Optional[Backend]:
+        """
+        Pick the backend for a job
+
+        The image's affinity node is used unless its load exceeds the least
+        loaded node's by more than GATEWAY_AFFINITY_SLACK weighted jobs.
+
+        Args:
+            kind: "text" or "table"
+            image_hash: Hash of the uploaded image
+            exclude: URLs already tried for this job
+
+        Returns:
+            Backend, or None if every backend was tried
+        """
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.url not in exclude]
+        available = [b for b in candidates if b.available(now)]
+        # With stale or failing health info, still try the remaining nodes
+        pool = available or candidates
+        if not pool:
+            return None
+
+        least = min(pool, key=lambda b: (b.load(), b.url))
+        preferred = max(pool, key=lambda b: _affinity_score(image_hash, b.url))
+        if preferred.load() <= least.load() + config.GATEWAY_AFFINITY_SLACK:
+            return preferred
+        return least
+
+    async def forward(self, kind: str, path: str, filename: str, content: bytes,
+                      content_type: Optional[str], params: Dict[str, str],
+                      headers: Dict[str, str]) -> Tuple[Backend, httpx.Response]:
+        """
+        Send an OCR job to a backend, retrying other nodes on failure
+
+        Args:
+            kind: "text" or "table"
+            path: Endpoint path on the backend ("/ocr" or "/table")
+            filename: Uploaded file name
+            content: Uploaded image bytes
+            content_type: Uploaded content type
+            params: Query parameters to pass through
+            headers: Request headers to pass through
+
+        Returns:
+            (backend that answered, its response)
+
+        Raises:
+            GatewayError: If every attempt failed
+        """
+        image_hash = hashlib.sha256(content).hexdigest()
+        tried: Set[str] = set()
+        errors = []
+        for _ in range(config.GATEWAY_MAX_ATTEMPTS):
+            backend = self.choose(kind, image_hash, exclude=tried)
+            if backend is None:
+                break
+            tried.add(backend.url)
+
+            backend.outstanding[kind] += 1
+            try:
+                response = await self.client.post(
+                    f"{backend.url}{path}",
+                    params=params,
+                    headers=headers,
+                    files={"file": (filename, content, content_type or "application/octet-stream")},
+                )
+            except httpx.TransportError as e:
+                self._mark_failed(backend, repr(e))
+                errors.append(f"{backend.url}: {e!r}")
+                continue
+            finally:
+                backend.outstanding[kind] -= 1
+
+            if response.status_code in RETRY_STATUSES:
+                self._mark_failed(backend, f"HTTP {response.status_code}")
+                errors.append(f"{backend.url}: HTTP {response.status_code}")
+                continue
+            return backend, response
+
+        raise GatewayError("; ".join(errors) or "No OCR backends configured")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [b.snapshot() for b in self.backends]
+
+
+# Global instance
+gateway_pool = BackendPool(config.GATEWAY_BACKENDS)
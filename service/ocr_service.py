@@ -2,10 +2,142 @@
 OCR Service layer with model caching and async processing
 """
 import asyncio
-from typing import Optional, Dict, Any, List
-from paddleocr import PaddleOCR, PPStructureV3
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Callable
 import config
-from models import OCRTextResult, BoundingBox
+from models import OCRTextResult, OCRLine, OCRParagraph, BoundingBox
+from .perf_profile import current_perf_settings, load_perf_profile, apply_perf_profile
+
+# paddleocr takes seconds to import; it is loaded on first model use so that
+# the app (and /health, /docs) start immediately
+if TYPE_CHECKING:
+    from paddleocr import PaddleOCR, PPStructureV3, TextRecognition
+
+
+def _perf_tuning_active() -> bool:
+    """
+    Whether the performance settings (detector side length, rec batch size,
+    dedicated executor) override Paddle's defaults
+    
+    They are tuned for CPU inference (autotune.py only profiles CPU), so on
+    GPU Paddle's defaults are kept.
+    """
+    return config.DEVICE == "cpu"
+
+
+def _cpu_kwargs(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """CPU-only Paddle options; empty when running on GPU"""
+    if config.DEVICE != "cpu":
+        return {}
+    return {
+        "cpu_threads": settings["cpu_threads"],
+        "enable_mkldnn": settings["enable_mkldnn"],
+    }
+
+
+def build_text_ocr_kwargs(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build PaddleOCR constructor arguments for the text OCR model
+    
+    Args:
+        settings: Performance settings (defaults to the ones currently in effect)
+        
+    Returns:
+        Keyword arguments for PaddleOCR
+    """
+    settings = settings or current_perf_settings()
+    kwargs = {"device": config.DEVICE, **_cpu_kwargs(settings)}
+    if _perf_tuning_active():
+        kwargs.update({
+            # "max" caps the longest side; Paddle's default "min" would upscale
+            # the shortest side to this length instead
+            "text_det_limit_type": config.TEXT_DET_LIMIT_TYPE,
+            "text_det_limit_side_len": settings["text_det_limit_side_len"],
+            "text_recognition_batch_size": settings["text_rec_batch_size"],
+        })
+    kwargs.update(config.TEXT_OCR_CONFIG)
+    
+    if config.CASCADE_CONFIG["enabled"]:
+        # The pipeline runs the fast recognizer; the accurate one is loaded separately
+        kwargs.pop("text_recognition_model_dir", None)
+        kwargs["text_recognition_model_name"] = config.CASCADE_CONFIG["fast_model_name"]
+        if config.CASCADE_CONFIG["fast_model_dir"]:
+            kwargs["text_recognition_model_dir"] = config.CASCADE_CONFIG["fast_model_dir"]
+    return kwargs
+
+
+def build_cascade_rec_kwargs(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build TextRecognition constructor arguments for the accurate cascade model
+    
+    Args:
+        settings: Performance settings (defaults to the ones currently in effect)
+        
+    Returns:
+        Keyword arguments for paddleocr.TextRecognition
+    """
+    settings = settings or current_perf_settings()
+    cascade = config.CASCADE_CONFIG
+    kwargs = {"device": config.DEVICE, **_cpu_kwargs(settings)}
+    model_name = cascade["accurate_model_name"] or config.TEXT_OCR_CONFIG.get("text_recognition_model_name")
+    model_dir = cascade["accurate_model_dir"] or config.TEXT_OCR_CONFIG.get("text_recognition_model_dir")
+    if model_name:
+        kwargs["model_name"] = model_name
+    if model_dir:
+        kwargs["model_dir"] = model_dir
+    return kwargs
+
+
+def build_table_ocr_kwargs(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build PPStructureV3 constructor arguments for the table OCR model
+    
+    Args:
+        settings: Performance settings (defaults to the ones currently in effect)
+        
+    Returns:
+        Keyword arguments for PPStructureV3
+    """
+    settings = settings or current_perf_settings()
+    kwargs = {"device": config.DEVICE, **_cpu_kwargs(settings)}
+    kwargs.update(config.TABLE_OCR_CONFIG)
+    return kwargs
+
+
+# Constructor options that change speed but not the recognized text
+_SPEED_ONLY_KWARGS = ("device", "cpu_threads", "enable_mkldnn", "text_recognition_batch_size")
+
+
+def model_fingerprint(endpoint: str) -> Dict[str, Any]:
+    """
+    Model settings that affect the output of an endpoint
+
+    Stored with each result so that cached results are only served while
+    the models, cascade and detector settings that produced them are unchanged.
+
+    Args:
+        endpoint: "ocr" or "table"
+
+    Returns:
+        JSON-serializable dictionary of the settings
+    """
+    def output_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in kwargs.items() if k not in _SPEED_ONLY_KWARGS}
+
+    if endpoint == "table":
+        return output_kwargs(build_table_ocr_kwargs())
+
+    cascade = config.CASCADE_CONFIG
+    fingerprint = {"pipeline": output_kwargs(build_text_ocr_kwargs()), "cascade": cascade["enabled"]}
+    if cascade["enabled"]:
+        fingerprint["cascade_threshold"] = cascade["score_threshold"]
+        fingerprint["cascade_rec"] = output_kwargs(build_cascade_rec_kwargs())
+    return fingerprint
 
 
 class OCRModelManager:
@@ -13,17 +145,69 @@ class OCRModelManager:
     Singleton class to manage PaddleOCR models with caching
     """
     _instance = None
-    _text_ocr_model: Optional[PaddleOCR] = None
-    _table_ocr_model: Optional[PPStructureV3] = None
+    _text_ocr_model: Optional["PaddleOCR"] = None
+    _table_ocr_model: Optional["PPStructureV3"] = None
+    _cascade_rec_model: Optional["TextRecognition"] = None
+    _executor: Optional[ThreadPoolExecutor] = None
     _text_lock = asyncio.Lock()  # Separate lock for text model
     _table_lock = asyncio.Lock()  # Separate lock for table model
+    _cascade_lock = asyncio.Lock()  # Separate lock for cascade recognizer
+    perf_profile_applied = False
+    inflight = {"text": 0, "table": 0}  # Jobs currently being processed, by kind
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            # Apply the autotuned profile before any model or executor is created
+            cls.perf_profile_applied = apply_perf_profile(load_perf_profile())
+            if cls.perf_profile_applied:
+                print(f"✅ Performance profile applied from {config.PERF_PROFILE_PATH}")
         return cls._instance
     
-    async def get_text_ocr_model(self) -> PaddleOCR:
+    @property
+    def executor(self) -> Optional[ThreadPoolExecutor]:
+        """
+        Thread pool used for model initialization and inference
+        
+        Sized by config.EXECUTOR_WORKERS so that executor threads times
+        Paddle's own cpu_threads do not oversubscribe the cores. None (the
+        event loop's default pool) on GPU.
+        """
+        if not _perf_tuning_active():
+            return None
+        if self._executor is None:
+            OCRModelManager._executor = ThreadPoolExecutor(
+                max_workers=config.EXECUTOR_WORKERS,
+                thread_name_prefix="ocr-infer"
+            )
+        return self._executor
+    
+    def load_report(self) -> Dict[str, Any]:
+        """
+        Current load, reported by /health for the gateway's load balancing
+        
+        Returns:
+            Dictionary with in-flight jobs by kind and inference capacity
+        """
+        return {
+            "text_jobs": self.inflight["text"],
+            "table_jobs": self.inflight["table"],
+            "inference_workers": self.inference_workers,
+        }
+    
+    @property
+    def inference_workers(self) -> int:
+        """
+        Number of OCR jobs that can make progress at the same time
+        
+        On CPU this is the executor size. On GPU jobs share one device, so
+        the capacity is 1 whatever the size of the default thread pool.
+        """
+        if self.executor is None:
+            return 1
+        return config.EXECUTOR_WORKERS
+    
+    async def get_text_ocr_model(self) -> "PaddleOCR":
         """
         Get or initialize text OCR model (lazy loading with caching)
         
@@ -34,17 +218,18 @@ class OCRModelManager:
             async with self._text_lock:  # Use text-specific lock
                 # Double-check locking pattern
                 if self._text_ocr_model is None:
-                    # Run model initialization in thread pool to avoid blocking
+                    # Run import and model initialization in thread pool to avoid blocking
+                    def load():
+                        from paddleocr import PaddleOCR
+                        return PaddleOCR(**build_text_ocr_kwargs())
+                    
                     loop = asyncio.get_event_loop()
-                    self._text_ocr_model = await loop.run_in_executor(
-                        None,
-                        lambda: PaddleOCR(**config.TEXT_OCR_CONFIG)
-                    )
+                    self._text_ocr_model = await loop.run_in_executor(self.executor, load)
                     print("✅ Text OCR model loaded and cached")
         
         return self._text_ocr_model
     
-    async def get_table_ocr_model(self) -> PPStructureV3:
+    async def get_table_ocr_model(self) -> "PPStructureV3":
         """
         Get or initialize table OCR model (lazy loading with caching)
         
@@ -55,41 +240,308 @@ class OCRModelManager:
             async with self._table_lock:  # Use table-specific lock
                 # Double-check locking pattern
                 if self._table_ocr_model is None:
-                    # Run model initialization in thread pool to avoid blocking
+                    # Run import and model initialization in thread pool to avoid blocking
+                    def load():
+                        from paddleocr import PPStructureV3
+                        return PPStructureV3(**build_table_ocr_kwargs())
+                    
                     loop = asyncio.get_event_loop()
-                    self._table_ocr_model = await loop.run_in_executor(
-                        None,
-                        lambda: PPStructureV3(**config.TABLE_OCR_CONFIG)
-                    )
+                    self._table_ocr_model = await loop.run_in_executor(self.executor, load)
                     print("✅ Table OCR model loaded and cached")
         
         return self._table_ocr_model
+    
+    async def get_cascade_rec_model(self) -> "TextRecognition":
+        """
+        Get or initialize the accurate recognizer used for cascade escalation
+        
+        Returns:
+            TextRecognition instance
+        """
+        if self._cascade_rec_model is None:
+            async with self._cascade_lock:
+                # Double-check locking pattern
+                if self._cascade_rec_model is None:
+                    # Run import and model initialization in thread pool to avoid blocking
+                    def load():
+                        from paddleocr import TextRecognition
+                        return TextRecognition(**build_cascade_rec_kwargs())
+                    
+                    loop = asyncio.get_event_loop()
+                    self._cascade_rec_model = await loop.run_in_executor(self.executor, load)
+                    print("✅ Cascade recognition model loaded and cached")
+        
+        return self._cascade_rec_model
 
 
 # Global instance
 model_manager = OCRModelManager()
 
 
-async def process_text_ocr(image_path: str) -> List[OCRTextResult]:
+def _tracked(kind: str):
+    """Count calls of the decorated coroutine as in-flight jobs of `kind`"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            model_manager.inflight[kind] += 1
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                model_manager.inflight[kind] -= 1
+        return wrapper
+    return decorator
+
+
+def _stage(timer, name: str):
+    """Time a block on the request timer, if there is one"""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+async def _run_inference(func: Callable[[], Any], timer=None, stage: Optional[str] = "inference") -> Any:
+    """
+    Run a model call in the inference executor
+    
+    Time spent queued for an executor thread is recorded as "model_wait",
+    the call itself under `stage`. The executor thread is registered on
+    the timer while it works for the request, so the profiler samples it.
+    
+    Args:
+        func: Blocking model call
+        timer: Optional RequestTimer (see profiling.py)
+        stage: Stage name for the call itself; None when func times its own stages
+        
+    Returns:
+        Return value of func
+    """
+    def timed():
+        started = time.perf_counter()
+        if timer is not None:
+            # Lets the profiler attribute this thread's stacks to the request
+            timer.threads.add(threading.get_ident())
+        try:
+            result = func()
+        finally:
+            if timer is not None:
+                timer.threads.discard(threading.get_ident())
+        return started, time.perf_counter(), result
+    
+    loop = asyncio.get_event_loop()
+    submitted = time.perf_counter()
+    started, finished, result = await loop.run_in_executor(model_manager.executor, timed)
+    if timer is not None:
+        timer.add("model_wait", (started - submitted) * 1000)
+        if stage is not None:
+            timer.add(stage, (finished - started) * 1000)
+    return result
+
+
+@_tracked("text")
+async def process_text_ocr(image_path: str, timer=None) -> Dict[str, Any]:
     """
     Process text OCR on an image
     
     Args:
         image_path: Path to image file
+        timer: Optional RequestTimer collecting per-stage durations
         
     Returns:
-        List of OCR text results
+        Dictionary with results in detection order, lines, paragraphs and
+        context text in reading order, and the number of lines escalated
+        to the accurate recognizer in cascade mode
     """
-    # Get cached model
-    ocr_model = await model_manager.get_text_ocr_model()
+    # Get cached models
+    with _stage(timer, "model_wait"):
+        ocr_model = await model_manager.get_text_ocr_model()
+        recognizer = None
+        if config.CASCADE_CONFIG["enabled"]:
+            recognizer = await model_manager.get_cascade_rec_model()
     
-    # Run OCR in thread pool to avoid blocking event loop
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        lambda: ocr_model.ocr(image_path)
-    )
-    # Parse results
+    def run() -> Dict[str, Any]:
+        # OCR, escalation, parsing and layout all run in one executor job:
+        # the event loop stays free and the profiler sees the whole request
+        with _stage(timer, "inference"):
+            result = ocr_model.ocr(image_path)
+        
+        escalated_lines = 0
+        if recognizer is not None:
+            from .cascade import escalate_low_confidence
+            
+            with _stage(timer, "cascade"):
+                escalated_lines = escalate_low_confidence(
+                    result, image_path, recognizer,
+                    threshold=config.CASCADE_CONFIG["score_threshold"],
+                    batch_size=config.TEXT_REC_BATCH_SIZE
+                )
+        
+        with _stage(timer, "parse"):
+            ocr_results = parse_text_ocr_result(result)
+        
+        with _stage(timer, "layout"):
+            layout = assemble_text_layout(ocr_results, _result_boxes(result, ocr_results))
+        
+        return {"results": ocr_results, **layout, "escalated_lines": escalated_lines}
+    
+    return await _run_inference(run, timer, stage=None)
+
+
+def rebuild_text_ocr(texts: List[str], scores: List[float], polygons: List[Any]) -> Dict[str, Any]:
+    """
+    Rebuild a text OCR result from stored texts, scores and polygons
+    
+    Args:
+        texts: Detected texts
+        scores: Confidence scores
+        polygons: Bounding polygons ([] when a detection had none)
+        
+    Returns:
+        Dictionary shaped like the return value of process_text_ocr
+    """
+    from .reading_order import boxes_from_polys
+    
+    ocr_results = [
+        OCRTextResult(
+            text=text,
+            confidence=score,
+            bounding_box=BoundingBox(points=poly) if poly else None
+        )
+        for text, score, poly in zip(texts, scores, polygons)
+    ]
+    layout = assemble_text_layout(ocr_results, boxes_from_polys(polygons))
+    return {"results": ocr_results, **layout, "escalated_lines": 0}
+
+
+@_tracked("text")
+async def process_frame_regions(frame: Any, regions: List[tuple], timer=None) -> Dict[str, Any]:
+    """
+    Process text OCR on regions of an in-memory frame (streaming endpoint)
+    
+    Frames are assumed upright, so document orientation and unwarping are
+    turned off; otherwise coordinates inside a crop could be rotated.
+    
+    Args:
+        frame: Decoded image (numpy array, BGR)
+        regions: (x0, y0, x1, y1) regions to recognize; use the whole frame for a full pass
+        timer: Optional RequestTimer collecting per-stage durations
+        
+    Returns:
+        Dictionary with "results" (bounding boxes in frame coordinates) and
+        "escalated_lines" (lines re-recognized by the accurate model)
+    """
+    with _stage(timer, "model_wait"):
+        ocr_model = await model_manager.get_text_ocr_model()
+        recognizer = None
+        if config.CASCADE_CONFIG["enabled"]:
+            recognizer = await model_manager.get_cascade_rec_model()
+    
+    def run() -> Dict[str, Any]:
+        import numpy as np
+        from .cascade import escalate_low_confidence
+        
+        ocr_results = []
+        escalated_lines = 0
+        for x0, y0, x1, y1 in regions:
+            crop = np.ascontiguousarray(frame[y0:y1, x0:x1])
+            result = ocr_model.ocr(crop, use_doc_orientation_classify=False, use_doc_unwarping=False)
+            if recognizer is not None:
+                escalated_lines += escalate_low_confidence(
+                    result, crop, recognizer,
+                    threshold=config.CASCADE_CONFIG["score_threshold"],
+                    batch_size=config.TEXT_REC_BATCH_SIZE
+                )
+            for r in parse_text_ocr_result(result):
+                if r.bounding_box:
+                    r.bounding_box.points = [[x + x0, y + y0] for x, y in r.bounding_box.points]
+                ocr_results.append(r)
+        return {"results": ocr_results, "escalated_lines": escalated_lines}
+    
+    return await _run_inference(run, timer)
+
+
+def _result_boxes(result: Any, ocr_results: List[OCRTextResult]):
+    """
+    Axis-aligned boxes of the parsed results as an (n, 4) array
+    
+    Uses the rec_boxes / rec_polys arrays of the new PaddleOCR format
+    directly, falling back to the parsed bounding boxes.
+    """
+    from .reading_order import as_box_array, boxes_from_polys
+    
+    first_result = result[0] if result else None
+    if isinstance(first_result, dict):
+        rec_boxes = first_result.get('rec_boxes')
+        if rec_boxes is not None and len(rec_boxes) == len(ocr_results):
+            return as_box_array(rec_boxes)
+        rec_polys = first_result.get('rec_polys')
+        if rec_polys is not None and len(rec_polys) == len(ocr_results):
+            return boxes_from_polys(rec_polys)
+    
+    return boxes_from_polys([
+        r.bounding_box.points if r.bounding_box else [] for r in ocr_results
+    ])
+
+
+def _box_points(x0: float, y0: float, x1: float, y1: float) -> BoundingBox:
+    """Axis-aligned box as 4 points (clockwise from top-left)"""
+    return BoundingBox(points=[[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+
+
+def assemble_text_layout(ocr_results: List[OCRTextResult], boxes) -> Dict[str, Any]:
+    """
+    Group OCR results into lines and paragraphs in reading order
+    
+    Args:
+        ocr_results: Parsed OCR results
+        boxes: (n, 4) array of [x0, y0, x1, y1], aligned with ocr_results
+        
+    Returns:
+        Dictionary with "lines", "paragraphs" and "context"
+    """
+    from .reading_order import reconstruct_reading_order
+    
+    reading = reconstruct_reading_order(boxes)
+    order = reading.order.tolist()
+    texts = [r.text for r in ocr_results]
+    scores = [r.confidence for r in ocr_results]
+    
+    lines = []
+    for start, end, column, box in zip(reading.line_starts.tolist(), reading.line_ends.tolist(),
+                                       reading.line_columns.tolist(), reading.line_boxes.tolist()):
+        members = order[start:end]
+        lines.append(OCRLine(
+            text=" ".join(texts[i] for i in members),
+            confidence=sum(scores[i] for i in members) / len(members),
+            bounding_box=_box_points(*box),
+            column=column,
+            result_indices=members,
+        ))
+    
+    paragraphs = []
+    for start, end, box in zip(reading.paragraph_starts.tolist(), reading.paragraph_ends.tolist(),
+                               reading.paragraph_boxes.tolist()):
+        paragraphs.append(OCRParagraph(
+            text=" ".join(line.text for line in lines[start:end]),
+            bounding_box=_box_points(*box),
+            column=lines[start].column,
+            line_indices=list(range(start, end)),
+        ))
+    
+    return {
+        "lines": lines,
+        "paragraphs": paragraphs,
+        "context": "\n".join(line.text for line in lines),
+    }
+
+
+def parse_text_ocr_result(result: Any) -> List[OCRTextResult]:
+    """
+    Convert raw PaddleOCR output into OCR text results
+    
+    Args:
+        result: Return value of PaddleOCR.ocr / PaddleOCR.predict
+        
+    Returns:
+        List of OCR text results
+    """
     ocr_results = []
     
     # New PaddleOCR format with custom config returns a list of dicts
@@ -140,62 +592,65 @@ async def process_text_ocr(image_path: str) -> List[OCRTextResult]:
     return ocr_results
 
 
-async def process_table_ocr(image_path: str, output_format: str = "markdown") -> Dict[str, Any]:
+@_tracked("table")
+async def process_table_ocr(image_path: str, output_format: str = "markdown", timer=None) -> Dict[str, Any]:
     """
     Process table OCR on an image
     
     Args:
         image_path: Path to image file
         output_format: Output format ("markdown" or "text")
+        timer: Optional RequestTimer collecting per-stage durations
         
     Returns:
         Dictionary with table content and metadata
     """
     # Get cached model
-    table_model = await model_manager.get_table_ocr_model()
+    with _stage(timer, "model_wait"):
+        table_model = await model_manager.get_table_ocr_model()
     
-    # Run table OCR in thread pool
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        lambda: table_model.predict(image_path)
-    )
-    
-    # Process results
-    content = ""
-    raw_result = None
-    
-    if result:
-        # PPStructureV3 returns a list of results
-        for res in result:
-            raw_result = {
-                "layout": getattr(res, 'layout', None),
-                "ocr": getattr(res, 'ocr', None),
-            }
-            
-            # Extract content based on format
-            if output_format == "markdown":
-                # Try to get markdown representation
-                try:
-                    # Save to markdown and read it
-                    import tempfile
-                    import os
-                    with tempfile.TemporaryDirectory() as tmp_dir:
-                        res.save_to_markdown(save_path=tmp_dir)
-                        # Find the generated markdown file
-                        md_files = [f for f in os.listdir(tmp_dir) if f.endswith('.md')]
-                        if md_files:
-                            with open(os.path.join(tmp_dir, md_files[0]), 'r', encoding='utf-8') as f:
-                                content = f.read()
-                except Exception as e:
-                    # Fallback to text if markdown fails
-                    content = str(res)
-            else:
-                # Plain text format
-                content = str(res)
+    def run() -> Dict[str, Any]:
+        # Prediction and content extraction run in one executor job
+        with _stage(timer, "inference"):
+            result = table_model.predict(image_path)
+        
+        # Process results
+        content = ""
+        raw_result = None
+        
+        if result:
+            # PPStructureV3 returns a list of results
+            for res in result:
+                raw_result = {
+                    "layout": getattr(res, 'layout', None),
+                    "ocr": getattr(res, 'ocr', None),
+                }
+                
+                # Extract content based on format
+                if output_format == "markdown":
+                    # Try to get markdown representation
+                    try:
+                        # Save to markdown and read it
+                        import tempfile
+                        with _stage(timer, "markdown"), tempfile.TemporaryDirectory() as tmp_dir:
+                            res.save_to_markdown(save_path=tmp_dir)
+                            # Find the generated markdown file
+                            md_files = [f for f in os.listdir(tmp_dir) if f.endswith('.md')]
+                            if md_files:
+                                with open(os.path.join(tmp_dir, md_files[0]), 'r', encoding='utf-8') as f:
+                                    content = f.read()
+                    except Exception as e:
+                        # Fallback to text if markdown fails
+                        content = str(res)
+                else:
+                    # Plain text format
+                    with _stage(timer, "parse"):
+                        content = str(res)
+        
+        return {
+            "format": output_format,
+            "content": content,
+            "raw_result": raw_result
+        }
     
-    return {
-        "format": output_format,
-        "content": content,
-        "raw_result": raw_result
-    }
+    return await _run_inference(run, timer, stage=None)
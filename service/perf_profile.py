@@ -0,0 +1,97 @@
+"""
+Performance profile written by autotune.py and applied at startup
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any
+import config
+
+# Profile key -> config attribute it overrides
+PROFILE_SETTINGS = {
+    "cpu_threads": "CPU_THREADS",
+    "enable_mkldnn": "ENABLE_MKLDNN",
+    "executor_workers": "EXECUTOR_WORKERS",
+    "text_det_limit_side_len": "TEXT_DET_LIMIT_SIDE_LEN",
+    "text_rec_batch_size": "TEXT_REC_BATCH_SIZE",
+}
+
+
+def current_perf_settings() -> Dict[str, Any]:
+    """
+    Get the performance settings currently in effect
+
+    Returns:
+        Dictionary keyed like PROFILE_SETTINGS
+    """
+    return {key: getattr(config, attr) for key, attr in PROFILE_SETTINGS.items()}
+
+
+def load_perf_profile(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load a performance profile from disk
+
+    Args:
+        path: Profile path (defaults to config.PERF_PROFILE_PATH)
+
+    Returns:
+        Profile dictionary, or None if missing or unreadable
+    """
+    path = Path(path or config.PERF_PROFILE_PATH)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable performance profile {path}: {e}")
+        return None
+
+
+def save_perf_profile(profile: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """
+    Write a performance profile to disk
+
+    Args:
+        profile: Profile dictionary (see autotune.py)
+        path: Profile path (defaults to config.PERF_PROFILE_PATH)
+
+    Returns:
+        Path the profile was written to
+    """
+    path = Path(path or config.PERF_PROFILE_PATH)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def apply_perf_profile(profile: Optional[Dict[str, Any]]) -> bool:
+    """
+    Override config settings with the values from a profile
+
+    A profile is only applied when it was tuned for the device in use and
+    on a host with the same core count: thread settings tuned for more
+    cores would oversubscribe this one.
+
+    Args:
+        profile: Profile dictionary or None
+
+    Returns:
+        True if the profile was applied
+    """
+    if not profile:
+        return False
+    if profile.get("device", "cpu") != config.DEVICE:
+        print(f"⚠️ Performance profile was tuned for {profile.get('device')}, not {config.DEVICE}; skipping")
+        return False
+    cpu_count = os.cpu_count()
+    if profile.get("cpu_count") != cpu_count:
+        print(f"⚠️ Performance profile was tuned on {profile.get('cpu_count')} cores, not {cpu_count}; "
+              f"skipping (re-run autotune.py on this host)")
+        return False
+
+    settings = profile.get("settings", {})
+    for key, attr in PROFILE_SETTINGS.items():
+        if key in settings:
+            setattr(config, attr, settings[key])
+    return True
@@ -0,0 +1,253 @@
+"""
+Reading-order reconstruction for OCR detections
+
+Groups detected boxes into lines, detects text columns and merges lines
+into paragraphs. Everything is computed on NumPy arrays with sorts and
+prefix sums, so the cost is O(n log n) in the number of boxes and stays
+low for dense pages with thousands of detections.
+"""
+from typing import Any, NamedTuple, Sequence
+import numpy as np
+
+# Tunables, expressed in multiples of the median box height
+LINE_TOLERANCE = 0.5      # Max vertical center offset between boxes of one line
+COLUMN_GAP = 1.0          # Min horizontal whitespace separating two columns
+PARAGRAPH_GAP = 0.8       # Vertical gap between lines that starts a new paragraph
+PARAGRAPH_INDENT = 1.0    # First-line indent that starts a new paragraph
+
+# Columns narrower than this fraction of the page are merged into a neighbour,
+# so that table cells are read row by row instead of cell column by cell column
+MIN_COLUMN_WIDTH = 0.2
+# Boxes wider than this fraction of the page are not used to find column gaps
+WIDE_BOX_WIDTH = 0.5
+# Table detection: a gap is between table columns, not text columns, when the
+# boxes on both sides sit on the same rows (this fraction of the boxes on one
+# side, half of it on the other) and either side was merged from several
+# narrow blocks or the gap is wider than TABLE_GAP (in median box heights)
+ROW_ALIGNMENT = 0.8
+TABLE_GAP = 2.5
+
+
+class ReadingOrder(NamedTuple):
+    """
+    Reading order of n boxes
+
+    order:            Box indices in reading order
+    line_starts:      Offset in `order` where each line starts
+    line_columns:     Column index of each line within its band
+    line_boxes:       (lines, 4) box enclosing each line
+    paragraph_starts: Index of the first line of each paragraph
+    paragraph_boxes:  (paragraphs, 4) box enclosing each paragraph
+    """
+    order: np.ndarray
+    line_starts: np.ndarray
+    line_columns: np.ndarray
+    line_boxes: np.ndarray
+    paragraph_starts: np.ndarray
+    paragraph_boxes: np.ndarray
+
+    @property
+    def line_ends(self) -> np.ndarray:
+        return np.append(self.line_starts[1:], len(self.order))
+
+    @property
+    def paragraph_ends(self) -> np.ndarray:
+        return np.append(self.paragraph_starts[1:], len(self.line_starts))
+
+
+def as_box_array(boxes: Any) -> np.ndarray:
+    """Coerce [x0, y0, x1, y1] boxes (e.g. PaddleOCR rec_boxes) to an (n, 4) float array"""
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def boxes_from_polys(polys: Sequence[Any]) -> np.ndarray:
+    """
+    Axis-aligned boxes [x0, y0, x1, y1] enclosing each polygon
+
+    Args:
+        polys: Sequence of (k, 2) point arrays or lists; empty entries give zero boxes
+
+    Returns:
+        (n, 4) float array
+    """
+    n = len(polys)
+    if n == 0:
+        return np.zeros((0, 4))
+    try:
+        # Fast path: all polygons have the same number of points
+        points = np.asarray(polys, dtype=np.float64).reshape(n, -1, 2)
+        return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)
+    except ValueError:
+        boxes = np.zeros((n, 4))
+        for i, poly in enumerate(polys):
+            points = np.asarray(poly, dtype=np.float64).reshape(-1, 2)
+            if len(points):
+                boxes[i, :2] = points.min(axis=0)
+                boxes[i, 2:] = points.max(axis=0)
+        return boxes
+
+
+def _aligned_fraction(cy: np.ndarray, y0: np.ndarray, y1: np.ndarray) -> float:
+    """Fraction of the centers `cy` lying inside the union of the y-ranges [y0, y1]"""
+    idx = np.argsort(y0, kind="stable")
+    starts, ends = y0[idx], np.maximum.accumulate(y1[idx])
+    # Last range starting at or above each center; the running max end covers all earlier ones
+    k = np.searchsorted(starts, cy, side="right") - 1
+    inside = (k >= 0) & (ends[np.maximum(k, 0)] >= cy)
+    return float(inside.mean())
+
+
+def _rows_aligned(a: np.ndarray, b: np.ndarray) -> bool:
+    """
+    Whether two sets of boxes sit on the same rows, as the cells of a table do
+
+    Multi-line cells on one side are allowed: only one side needs most of
+    its boxes aligned, the other side at least half as many.
+    """
+    if min(len(a), len(b)) < 2:
+        return False
+    a_cy, b_cy = (a[:, 1] + a[:, 3]) / 2, (b[:, 1] + b[:, 3]) / 2
+    fractions = (_aligned_fraction(a_cy, b[:, 1], b[:, 3]), _aligned_fraction(b_cy, a[:, 1], a[:, 3]))
+    return max(fractions) >= ROW_ALIGNMENT and min(fractions) >= ROW_ALIGNMENT / 2
+
+
+def _column_bounds(boxes: np.ndarray, gap: float, min_width: float, table_gap: float) -> np.ndarray:
+    """
+    Find x positions separating text columns
+
+    Merges the x-intervals of the boxes (sorted by x0) and keeps the gaps
+    wider than `gap` whose neighbouring columns are at least `min_width` wide.
+    A gap is dropped when it separates table columns rather than text
+    columns (see _rows_aligned), so that table rows are read across.
+
+    Args:
+        boxes: (n, 4) array of [x0, y0, x1, y1]
+        gap: Min whitespace between columns
+        min_width: Min column width
+        table_gap: Gap width above which row-aligned columns are a table
+
+    Returns:
+        Sorted array of column boundaries (empty for a single column)
+    """
+    if len(boxes) < 2:
+        return np.zeros(0)
+    x0, x1 = boxes[:, 0], boxes[:, 2]
+    idx = np.argsort(x0, kind="stable")
+    starts, ends = x0[idx], np.maximum.accumulate(x1[idx])
+    # A gap opens where a box starts after every previous box has ended
+    gap_at = np.flatnonzero(starts[1:] - ends[:-1] > gap) + 1
+    if len(gap_at) == 0:
+        return np.zeros(0)
+
+    block_starts = starts[np.r_[0, gap_at]]
+    block_ends = ends[np.r_[gap_at - 1, len(starts) - 1]]
+
+    # Greedily grow columns left to right until they are wide enough,
+    # counting the blocks merged into each column
+    bounds, blocks, widths = [], [1], []
+    column_start = block_starts[0]
+    for i in range(len(block_starts) - 1):
+        if block_ends[i] - column_start >= min_width:
+            bounds.append((block_ends[i] + block_starts[i + 1]) / 2)
+            widths.append(block_starts[i + 1] - block_ends[i])
+            column_start = block_starts[i + 1]
+            blocks.append(1)
+        else:
+            blocks[-1] += 1
+    # A narrow last column is merged into the previous one
+    if bounds and block_ends[-1] - column_start < min_width:
+        bounds.pop()
+        widths.pop()
+        blocks[-2] += blocks.pop()
+    if not bounds:
+        return np.zeros(0)
+
+    column = np.searchsorted(bounds, (x0 + x1) / 2)
+    kept = []
+    for i, bound in enumerate(bounds):
+        tabular = blocks[i] > 1 or blocks[i + 1] > 1 or widths[i] > table_gap
+        if not (tabular and _rows_aligned(boxes[column == i], boxes[column == i + 1])):
+            kept.append(bound)
+    return np.asarray(kept)
+
+
+def _enclosing_boxes(boxes: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Box enclosing each run of consecutive boxes beginning at `starts`"""
+    return np.concatenate([
+        np.minimum.reduceat(boxes[:, :2], starts, axis=0),
+        np.maximum.reduceat(boxes[:, 2:], starts, axis=0),
+    ], axis=1)
+
+
+def reconstruct_reading_order(boxes: np.ndarray) -> ReadingOrder:
+    """
+    Compute reading order, lines, columns and paragraphs
+
+    The page is split into horizontal bands at boxes spanning several
+    columns (titles, full-width paragraphs). Inside a band, columns are
+    read left to right, lines top to bottom and boxes within a line left
+    to right.
+
+    Args:
+        boxes: (n, 4) array of [x0, y0, x1, y1]
+
+    Returns:
+        ReadingOrder
+    """
+    boxes = as_box_array(boxes)
+    n = len(boxes)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return ReadingOrder(empty, empty, empty, np.zeros((0, 4)), empty, np.zeros((0, 4)))
+
+    x0, y0, x1, y1 = boxes.T
+    height = np.maximum(y1 - y0, 1.0)
+    cy = (y0 + y1) / 2
+    unit = float(np.median(height))
+    page_width = max(float(x1.max() - x0.min()), 1.0)
+
+    # Columns, found from boxes that do not span the page
+    narrow = (x1 - x0) < WIDE_BOX_WIDTH * page_width
+    bounds = _column_bounds(boxes[narrow], COLUMN_GAP * unit, MIN_COLUMN_WIDTH * page_width, TABLE_GAP * unit)
+    tolerance = 0.5 * unit
+    first_col = np.searchsorted(bounds, x0 + tolerance)
+    last_col = np.searchsorted(bounds, x1 - tolerance)
+    spanning = last_col > first_col
+    column = np.where(spanning, 0, first_col)
+
+    # Bands: a new band starts wherever vertical order switches between
+    # spanning and column boxes
+    by_y = np.argsort(cy, kind="stable")
+    switches = np.r_[0, spanning[by_y][1:] != spanning[by_y][:-1]]
+    band = np.empty(n, dtype=np.int64)
+    band[by_y] = np.cumsum(switches)
+
+    # Lines: within a (band, column), sort by vertical center and break where
+    # the center jumps by more than the line tolerance
+    order = np.lexsort((cy, column, band))
+    same_group = (band[order][1:] == band[order][:-1]) & (column[order][1:] == column[order][:-1])
+    limit = LINE_TOLERANCE * np.minimum(height[order][1:], height[order][:-1])
+    new_line = ~same_group | (np.diff(cy[order]) > limit)
+    line_of = np.empty(n, dtype=np.int64)
+    line_of[order] = np.cumsum(np.r_[0, new_line])
+
+    # Final order: by line, then left to right
+    order = np.lexsort((x0, line_of))
+    line_starts = np.flatnonzero(np.r_[True, np.diff(line_of[order]) != 0])
+
+    # Per-line extents for paragraph merging
+    line_boxes = _enclosing_boxes(boxes[order], line_starts)
+    line_x0, line_y0, _, line_y1 = line_boxes.T
+    line_band = band[order][line_starts]
+    line_columns = column[order][line_starts]
+
+    new_paragraph = (
+        (line_band[1:] != line_band[:-1])
+        | (line_columns[1:] != line_columns[:-1])
+        | (line_y0[1:] - line_y1[:-1] > PARAGRAPH_GAP * unit)
+        | (line_x0[1:] - line_x0[:-1] > PARAGRAPH_INDENT * unit)
+    )
+    paragraph_starts = np.flatnonzero(np.r_[True, new_paragraph])
+    paragraph_boxes = _enclosing_boxes(line_boxes, paragraph_starts)
+
+    return ReadingOrder(order, line_starts, line_columns, line_boxes, paragraph_starts, paragraph_boxes)
@@ -0,0 +1,330 @@
+"""
+Persistent store of OCR results (SQLite) with a background batching writer
+
+Requests only enqueue a record; a writer thread inserts them in batches,
+so the request path never waits on disk. The queue is bounded (records
+are dropped, and counted, when it is full) and the database file is
+rotated once it grows beyond the configured size.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    image_hash TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    texts TEXT,
+    scores TEXT,
+    polygons TEXT,
+    content TEXT,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_hash ON results (image_hash, endpoint);
+"""
+
+COLUMNS = ("image_hash", "endpoint", "params", "created_at", "texts", "scores", "polygons", "content", "timings")
+JSON_COLUMNS = ("params", "texts", "scores", "polygons", "timings")
+
+_STOP = object()
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def make_params_key(params: Optional[Dict[str, Any]]) -> str:
+    """Canonical JSON of request options, used to match cached results"""
+    return json.dumps(params or {}, sort_keys=True, separators=(",", ":"))
+
+
+class ResultStore:
+    """
+    SQLite result store with bounded queue, batched inserts and size-based rotation
+    """
+
+    def __init__(self, path: Path, queue_size: int, batch_size: int,
+                 flush_interval: float, max_bytes: int, keep_rotated: int):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.keep_rotated = keep_rotated
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Records accepted but not yet written, so lookups see them immediately
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = 0
+        self._db_lock = threading.Lock()  # Held while rotating files
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="result-store-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Flush pending records and stop the writer (blocking; run in an executor)
+
+        Gives up after `timeout` seconds, e.g. when the disk hangs; the
+        writer is a daemon thread and does not keep the process alive.
+        """
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print(f"⚠️ Result store queue still full after {timeout}s; {self._queue.qsize()} records not written")
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            print("⚠️ Result store writer did not finish in time")
+        self._thread = None
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Writer state, reported by /health
+
+        Returns:
+            Dictionary with queued and dropped record counts and the last write error
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+    # Request path
+
+    def submit(self, image_hash: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+               texts: Optional[List[str]] = None, scores: Optional[List[float]] = None,
+               polygons: Optional[List[Any]] = None, content: Optional[str] = None,
+               timings: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Queue a record for writing (never blocks)
+
+        Returns:
+            False if the queue was full and the record was dropped
+        """
+        record = {
+            "image_hash": image_hash,
+            "endpoint": endpoint,
+            "params": make_params_key(params),
+            "created_at": time.time(),
+            "texts": _dumps(texts),
+            "scores": _dumps(scores),
+            "polygons": _dumps(polygons),
+            "content": content,
+            "timings": _dumps({k: round(v, 1) for k, v in (timings or {}).items()}),
+        }
+        with self._pending_lock:
+            self._ids += 1
+            record_id = self._ids
+            self._pending[record_id] = record
+        try:
+            self._queue.put_nowait((record_id, record))
+            return True
+        except queue.Full:
+            with self._pending_lock:
+                self._pending.pop(record_id, None)
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"⚠️ Result store queue full; {self.dropped} records dropped so far")
+            return False
+
+    def lookup(self, image_hash: str, endpoint: Optional[str] = None,
+               params: Optional[Dict[str, Any]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Find stored results for an image, newest first (blocking; run in an executor)
+
+        Args:
+            image_hash: SHA-256 of the image bytes
+            endpoint: Restrict to "ocr" or "table"
+            params: Restrict to results produced with these request options
+            limit: Maximum number of results
+
+        Returns:
+            List of decoded records
+
+        Raises:
+            sqlite3.Error: A database file cannot be read (a file without
+                the results table yet is skipped)
+        """
+        params_key = make_params_key(params) if params is not None else None
+
+        def matches(record: Dict[str, Any]) -> bool:
+            return (record["image_hash"] == image_hash
+                    and (endpoint is None or record["endpoint"] == endpoint)
+                    and (params_key is None or record["params"] == params_key))
+
+        with self._pending_lock:
+            found = [r for r in reversed(list(self._pending.values())) if matches(r)]
+
+        query = f"SELECT {', '.join(COLUMNS)} FROM results WHERE image_hash = ?"
+        args: List[Any] = [image_hash]
+        if endpoint is not None:
+            query += " AND endpoint = ?"
+            args.append(endpoint)
+        if params_key is not None:
+            query += " AND params = ?"
+            args.append(params_key)
+        query += " ORDER BY created_at DESC LIMIT ?"
+
+        with self._db_lock:
+            for db_path in self._db_files():
+                if len(found) >= limit:
+                    break
+                conn = sqlite3.connect(db_path)
+                try:
+                    rows = conn.execute(query, args + [limit - len(found)]).fetchall()
+                except sqlite3.OperationalError as e:
+                    if "no such table" not in str(e):
+                        print(f"⚠️ Result store lookup failed on {db_path.name}: {e}")
+                        raise
+                    rows = []  # File exists but has no table yet
+                finally:
+                    conn.close()
+                found.extend(dict(zip(COLUMNS, row)) for row in rows)
+
+        # A batch written during the lookup can show up both pending and on disk
+        unique, seen = [], set()
+        for record in found:
+            key = (record["created_at"], record["endpoint"], record["params"])
+            if key not in seen:
+                seen.add(key)
+                unique.append(record)
+        return [self._decode(r) for r in unique[:limit]]
+
+    @staticmethod
+    def _decode(record: Dict[str, Any]) -> Dict[str, Any]:
+        decoded = dict(record)
+        for column in JSON_COLUMNS:
+            if decoded[column] is not None:
+                decoded[column] = json.loads(decoded[column])
+        return decoded
+
+    # Files
+
+    def _rotated_path(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{index}{self.path.suffix}")
+
+    def _db_files(self) -> List[Path]:
+        """Current database followed by rotated ones, newest first"""
+        paths = [self.path] + [self._rotated_path(i) for i in range(1, self.keep_rotated + 1)]
+        return [p for p in paths if p.exists()]
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _rotate(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        """Shift results.sqlite3 -> results.1.sqlite3 -> ... and start a new file"""
+        conn.close()
+        with self._db_lock:
+            oldest = self._rotated_path(self.keep_rotated)
+            if oldest.exists():
+                oldest.unlink()
+            for i in range(self.keep_rotated - 1, 0, -1):
+                if self._rotated_path(i).exists():
+                    self._rotated_path(i).rename(self._rotated_path(i + 1))
+            if self.keep_rotated > 0:
+                self.path.rename(self._rotated_path(1))
+            else:
+                self.path.unlink()
+        print(f"🗄️ Result store rotated ({self.path})")
+        return self._connect()
+
+    # Writer thread
+
+    def _next_batch(self) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """
+        Collect up to batch_size records, waiting at most flush_interval
+
+        Returns:
+            (batch, whether stop() was requested)
+        """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn: Optional[sqlite3.Connection],
+               batch: List[Tuple[int, Dict[str, Any]]]) -> Optional[sqlite3.Connection]:
+        """
+        Insert a batch and rotate the file if it grew too large
+
+        Returns:
+            Connection to use for the next batch (None after an error, so
+            that the next batch reconnects)
+        """
+        try:
+            if conn is None:
+                conn = self._connect()
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [tuple(record[c] for c in COLUMNS) for _, record in batch]
+                )
+            if self.path.stat().st_size > self.max_bytes:
+                conn = self._rotate(conn)
+            self.last_error = None
+            return conn
+        except Exception as e:
+            # Disk full, permissions, a failed rename while rotating...
+            self.last_error = repr(e)
+            print(f"⚠️ Result store write or rotation failed: {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            return None
+
+    def _run(self) -> None:
+        conn: Optional[sqlite3.Connection] = None
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            # A failed batch is lost, but the writer keeps serving the queue
+            conn = self._write(conn, batch)
+            with self._pending_lock:
+                for record_id, _ in batch:
+                    self._pending.pop(record_id, None)
+        if conn is not None:
+            conn.close()
+
+
+# Global instance (started by the app when config.RESULT_STORE_ENABLED)
+result_store = ResultStore(
+    path=config.RESULT_STORE_PATH,
+    queue_size=config.RESULT_STORE_QUEUE_SIZE,
+    batch_size=config.RESULT_STORE_BATCH_SIZE,
+    flush_interval=config.RESULT_STORE_FLUSH_INTERVAL,
+    max_bytes=config.RESULT_STORE_MAX_BYTES,
+    keep_rotated=config.RESULT_STORE_KEEP_ROTATED,
+)
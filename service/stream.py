@@ -0,0 +1,212 @@
+"""
+Change detection and incremental text state for streaming (video/camera) OCR
+"""
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple, Dict, Any
+import cv2
+import numpy as np
+import config
+from models import OCRTextResult
+
+Region = Tuple[int, int, int, int]  # x0, y0, x1, y1 in frame pixels
+
+
+class FrameChange(NamedTuple):
+    """
+    Result of comparing a frame with the last processed one
+
+    kind:    "full" (OCR whole frame), "regions" (OCR `regions` only) or "skip"
+    regions: Changed regions for kind == "regions", else the whole frame or empty
+    changed: Fraction of thumbnail pixels that changed
+    """
+    kind: str
+    regions: List[Region]
+    changed: float
+
+
+def region_area(regions: List[Region]) -> int:
+    """Total area of non-overlapping regions"""
+    return sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+
+
+def regions_too_large(regions: List[Region], width: int, height: int) -> bool:
+    """Whether OCR of the regions costs about as much as the whole frame"""
+    return region_area(regions) > config.STREAM_MAX_REGION_FRACTION * width * height
+
+
+def decode_frame(data: bytes) -> Optional[np.ndarray]:
+    """Decode an encoded image (JPEG, PNG, WebP...) in memory; None if invalid"""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class FrameChangeDetector:
+    """
+    Compares frames on a downscaled grayscale thumbnail
+
+    Frames whose thumbnail barely differs from the last processed frame are
+    skipped; small changes are turned into padded regions of the full frame.
+    """
+
+    def __init__(self):
+        self._reference: Optional[np.ndarray] = None
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        thumb_width = min(config.STREAM_THUMBNAIL_WIDTH, width)
+        thumb_height = max(1, round(height * thumb_width / width))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        # Blur so sensor noise and compression artifacts do not count as changes
+        return cv2.GaussianBlur(thumb, (3, 3), 0)
+
+    def compare(self, frame: np.ndarray) -> Tuple[FrameChange, np.ndarray]:
+        """
+        Compare a frame with the last committed one
+
+        Returns:
+            (FrameChange, thumbnail to pass to commit() once the frame is processed)
+        """
+        height, width = frame.shape[:2]
+        whole = [(0, 0, width, height)]
+        thumb = self._thumbnail(frame)
+        if self._reference is None or frame.shape != self._frame_shape:
+            return FrameChange("full", whole, 1.0), thumb
+
+        mask = (cv2.absdiff(thumb, self._reference) > config.STREAM_PIXEL_THRESHOLD).astype(np.uint8)
+        changed = float(mask.mean())
+        if changed < config.STREAM_CHANGE_THRESHOLD:
+            return FrameChange("skip", [], changed), thumb
+
+        # Connected changed areas -> padded regions in full-frame coordinates
+        mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        scale_x, scale_y = width / thumb.shape[1], height / thumb.shape[0]
+        pad = config.STREAM_REGION_PADDING
+        regions = []
+        for x, y, w, h, _ in stats[1:count]:
+            regions.append((
+                max(0, int(x * scale_x) - pad),
+                max(0, int(y * scale_y) - pad),
+                min(width, int((x + w) * scale_x) + pad),
+                min(height, int((y + h) * scale_y) + pad),
+            ))
+
+        if regions_too_large(regions, width, height):
+            return FrameChange("full", whole, changed), thumb
+        return FrameChange("regions", regions, changed), thumb
+
+    def commit(self, frame: np.ndarray, thumb: np.ndarray) -> None:
+        """Make a processed frame the reference for the next comparison"""
+        self._reference = thumb
+        self._frame_shape = frame.shape
+
+
+def _box(result: OCRTextResult) -> Optional[Region]:
+    if not result.bounding_box or not result.bounding_box.points:
+        return None
+    xs = [p[0] for p in result.bounding_box.points]
+    ys = [p[1] for p in result.bounding_box.points]
+    return int(min(xs)), int(min(ys)), int(max(xs)) + 1, int(max(ys)) + 1
+
+
+def _intersects(a: Region, b: Region) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a: Region, b: Region) -> Region:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _result_payload(result: OCRTextResult) -> Dict[str, Any]:
+    return {
+        "text": result.text,
+        "confidence": result.confidence,
+        "bounding_box": result.bounding_box.points if result.bounding_box else None,
+    }
+
+
+class StreamTextState:
+    """
+    Text currently visible in a stream, updated from full or partial OCR passes
+    """
+
+    def __init__(self):
+        self.results: List[OCRTextResult] = []
+
+    def expand_regions(self, regions: List[Region]) -> List[Region]:
+        """
+        Grow changed regions to cover the known text lines they touch
+
+        A change inside a line then re-recognizes the whole line instead of
+        a fragment of it. Regions that overlap after growing are merged, so
+        no line is recognized (and reported) twice. The merged area can
+        exceed the budget; check it with regions_too_large().
+
+        Returns:
+            Non-overlapping regions, top to bottom
+        """
+        boxes = [b for b in map(_box, self.results) if b is not None]
+
+        def grow(region: Region) -> Region:
+            # Growing can reach further lines, so repeat until stable
+            while True:
+                grown = region
+                for box in boxes:
+                    if _intersects(grown, box):
+                        grown = _union(grown, box)
+                if grown == region:
+                    return region
+                region = grown
+
+        pending = [grow(region) for region in regions]
+        merged: List[Region] = []
+        while pending:
+            region = pending.pop()
+            for i, other in enumerate(merged):
+                if _intersects(region, other):
+                    merged.pop(i)
+                    pending.append(grow(_union(region, other)))
+                    break
+            else:
+                merged.append(region)
+        return sorted(merged, key=lambda r: (r[1], r[0]))
+
+    def update(self, results: List[OCRTextResult],
+               regions: Optional[List[Region]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Replace the text inside `regions` (or everywhere) and return the diff
+
+        Args:
+            results: OCR results in frame coordinates
+            regions: Regions that were re-recognized; None for a full frame
+
+        Returns:
+            {"added": [...], "removed": [...]} compared by text
+        """
+        if regions is None:
+            replaced, kept = self.results, []
+        else:
+            replaced, kept = [], []
+            for result in self.results:
+                box = _box(result)
+                inside = box is not None and any(_intersects(box, region) for region in regions)
+                (replaced if inside else kept).append(result)
+        self.results = kept + results
+
+        # Lines whose text is unchanged are not reported
+        unchanged = Counter(r.text for r in replaced) & Counter(r.text for r in results)
+        removed, added = [], []
+        budget = Counter(unchanged)
+        for result in replaced:
+            if budget[result.text] > 0:
+                budget[result.text] -= 1
+            else:
+                removed.append(_result_payload(result))
+        budget = Counter(unchanged)
+        for result in results:
+            if budget[result.text] > 0:
+                budget[result.text] -= 1
+            else:
+                added.append(_result_payload(result))
+        return {"added": added, "removed": removed}
@@ -0,0 +1,116 @@
+"""
+Cascade escalation: line crops, textline orientation and merging of the two readings
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_cascade.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from service.cascade import (  # noqa: E402
+    _upside_down_lines, crop_text_line, escalate_low_confidence
+)
+
+
+class StubRecognizer:
+    """Stands in for paddleocr.TextRecognition; records the crops it gets"""
+
+    def __init__(self, score=0.95):
+        self.score = score
+        self.crops = []
+
+    def predict(self, input, batch_size=1):
+        self.crops.extend(input)
+        return [{"rec_text": f"accurate{i}", "rec_score": self.score} for i in range(len(input))]
+
+
+def quad(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+
+def line_image():
+    """100x40 image: two 20px rows, each dark on its left half and light on its right"""
+    image = np.full((40, 100, 3), 255, dtype=np.uint8)
+    image[:, :50] = 0
+    return image
+
+
+def test_crop_text_line_rectifies_quads():
+    image = line_image()
+    crop = crop_text_line(image, quad(0, 0, 100, 20))
+    assert crop.shape[:2] == (20, 100)
+    # A tall quad is a vertical line and is turned horizontal
+    assert crop_text_line(image, quad(0, 0, 10, 40)).shape[:2] == (10, 40)
+    # Other polygons fall back to their bounding rectangle
+    assert crop_text_line(image, [[10, 5], [30, 5], [30, 15]]).shape[:2] == (11, 21)
+
+
+def test_upside_down_lines_follow_dt_polys_when_lines_were_filtered():
+    kept, dropped, other = quad(0, 0, 10, 5), quad(0, 10, 10, 15), quad(0, 20, 10, 25)
+    first_result = {
+        "dt_polys": [kept, dropped, other],
+        "rec_polys": [kept, other],
+        "textline_orientation_angles": [0, 1, 1],
+    }
+    # The dropped line's angle must not shift onto the following lines
+    assert _upside_down_lines(first_result) == [False, True]
+
+
+def test_upside_down_lines_without_orientation():
+    polys = [quad(0, 0, 10, 5), quad(0, 10, 10, 15)]
+    assert _upside_down_lines({"rec_polys": polys}) == [False, False]
+    assert _upside_down_lines({"rec_polys": polys, "textline_orientation_angles": [-1, -1]}) == [False, False]
+    assert _upside_down_lines({"rec_polys": polys, "textline_orientation_angles": [1, 0]}) == [True, False]
+
+
+def test_escalated_crops_are_turned_like_the_pipeline_did():
+    polys = [quad(0, 0, 100, 20), quad(0, 20, 100, 40)]
+    result = [{
+        "rec_texts": ["a", "b"], "rec_scores": [0.1, 0.2], "rec_polys": polys, "dt_polys": polys,
+        "textline_orientation_angles": [1, 0],
+    }]
+    recognizer = StubRecognizer()
+    assert escalate_low_confidence(result, line_image(), recognizer, threshold=0.5) == 2
+
+    upside_down, upright = recognizer.crops
+    # The dark half moves to the right when the line is turned by 180 degrees
+    assert upside_down[:, :40].min() == 255 and upside_down[:, 60:].max() == 0
+    assert upright[:, :40].max() == 0 and upright[:, 60:].min() == 255
+
+
+def test_only_low_scores_are_escalated_and_the_better_reading_wins():
+    polys = [quad(0, 0, 100, 20), quad(0, 20, 100, 40), quad(0, 0, 50, 40)]
+    result = [{"rec_texts": ["good", "bad", "worse"], "rec_scores": [0.99, 0.6, 0.3], "rec_polys": polys}]
+
+    assert escalate_low_confidence(result, line_image(), StubRecognizer(score=0.5), threshold=0.9) == 2
+    # 0.6 beats the accurate model's 0.5; 0.3 does not
+    assert result[0]["rec_texts"] == ["good", "bad", "accurate1"]
+    assert result[0]["rec_scores"] == [0.99, 0.6, 0.5]
+
+
+def test_nothing_to_escalate():
+    recognizer = StubRecognizer()
+    result = [{"rec_texts": ["a"], "rec_scores": [0.95], "rec_polys": [quad(0, 0, 10, 5)]}]
+    assert escalate_low_confidence(result, line_image(), recognizer, threshold=0.5) == 0
+    assert escalate_low_confidence([], line_image(), recognizer, threshold=0.5) == 0
+    assert recognizer.crops == []
+
+
+def test_preprocessed_image_is_cropped():
+    # Polygons refer to the orientation-corrected image, not the original
+    preprocessed = np.full((40, 100, 3), 128, dtype=np.uint8)
+    result = [{
+        "rec_texts": ["a"], "rec_scores": [0.1], "rec_polys": [quad(0, 0, 100, 20)],
+        "doc_preprocessor_res": {"output_img": preprocessed},
+    }]
+    recognizer = StubRecognizer()
+    escalate_low_confidence(result, line_image(), recognizer, threshold=0.5)
+    assert (recognizer.crops[0] == 128).all()
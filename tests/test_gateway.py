@@ -0,0 +1,176 @@
+"""
+Gateway mode: health polling, backend choice and forwarding with retries
+
+Backends are simulated with httpx.MockTransport. Run with pytest from the
+repository root:
+    python -m pytest -q tests/test_gateway.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from service.gateway import BackendPool, GatewayError, _affinity_score  # noqa: E402
+
+A, B, C = "http://a", "http://b", "http://c"
+
+
+@pytest.fixture(autouse=True)
+def gateway_config(monkeypatch):
+    monkeypatch.setattr(config, "GATEWAY_JOB_WEIGHTS", {"text": 1.0, "table": 4.0})
+    monkeypatch.setattr(config, "GATEWAY_AFFINITY_SLACK", 4.0)
+    monkeypatch.setattr(config, "GATEWAY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(config, "GATEWAY_FAILURE_COOLDOWN", 10.0)
+
+
+def make_pool(handler, urls=(A, B)):
+    pool = BackendPool(list(urls))
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+def health(text=0, table=0, workers=1, status="healthy"):
+    return {"status": status, "load": {"text_jobs": text, "table_jobs": table, "inference_workers": workers}}
+
+
+def backend(pool, url):
+    return next(b for b in pool.backends if b.url == url)
+
+
+# Health polling
+
+def test_poll_reads_load_and_survives_bad_payloads():
+    bodies = {A: health(text=2, table=1, workers=2), B: [1, 2]}
+
+    def handler(request):
+        url = f"{request.url.scheme}://{request.url.host}"
+        if url == C:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, json=bodies[url])
+
+    pool = make_pool(handler, urls=(A, B, C))
+    asyncio.run(pool.poll_health())
+
+    a, b, c = (backend(pool, url) for url in (A, B, C))
+    assert a.healthy and a.reported == {"text": 2, "table": 1} and a.workers == 2
+    assert a.load() == (2 * 1.0 + 1 * 4.0) / 2
+    assert not b.healthy and "unexpected /health body" in b.last_error
+    assert not c.healthy and "ConnectError" in c.last_error
+
+
+def test_poll_loop_keeps_running_after_errors(monkeypatch):
+    monkeypatch.setattr(config, "GATEWAY_HEALTH_INTERVAL", 0.01)
+    pool = make_pool(lambda request: httpx.Response(200, json=health()))
+    calls = []
+
+    async def flaky_poll():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    pool.poll_health = flaky_poll
+
+    async def run():
+        task = asyncio.create_task(pool._poll_forever())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return task
+
+    task = asyncio.run(run())
+    assert len(calls) >= 3
+    assert task.cancelled()
+
+
+# Backend choice
+
+def test_choose_prefers_affinity_node_within_slack():
+    pool = make_pool(lambda request: httpx.Response(200))
+    image_hash = "abc"
+    preferred = max((A, B), key=lambda url: _affinity_score(image_hash, url))
+    other = B if preferred == A else A
+
+    backend(pool, preferred).outstanding["text"] = 4  # Exactly the slack
+    assert pool.choose("text", image_hash, exclude=set()).url == preferred
+
+    backend(pool, preferred).outstanding["table"] = 1  # 4 + 4 > 0 + slack
+    assert pool.choose("text", image_hash, exclude=set()).url == other
+
+
+def test_choose_excludes_tried_and_falls_back_to_failed_nodes():
+    pool = make_pool(lambda request: httpx.Response(200))
+    backend(pool, A).healthy = False
+    assert pool.choose("text", "h", exclude=set()).url == B
+    # Only failed nodes left: still try them rather than giving up
+    assert pool.choose("text", "h", exclude={B}).url == A
+    assert pool.choose("text", "h", exclude={A, B}) is None
+
+
+def test_load_is_normalized_by_inference_workers():
+    pool = make_pool(lambda request: httpx.Response(200))
+    cpu, gpu = backend(pool, A), backend(pool, B)
+    cpu.workers, cpu.outstanding["text"] = 2, 4
+    gpu.workers, gpu.outstanding["text"] = 1, 3
+    assert cpu.load() == 2 and gpu.load() == 3
+
+
+# Forwarding
+
+def forward(pool, kind="text"):
+    return asyncio.run(pool.forward(kind, "/ocr", "a.png", b"image", "image/png", {}, {}))
+
+
+@pytest.mark.parametrize("failure", ["transport", 502, 503, 504])
+def test_forward_retries_on_another_backend(failure):
+    seen = []
+
+    def handler(request):
+        url = f"{request.url.scheme}://{request.url.host}"
+        seen.append(url)
+        if len(seen) == 1:
+            if failure == "transport":
+                raise httpx.ConnectError("refused")
+            return httpx.Response(failure)
+        return httpx.Response(200, json={"success": True})
+
+    pool = make_pool(handler)
+    answered, response = forward(pool)
+
+    assert response.status_code == 200 and answered.url == seen[1] != seen[0]
+    failed = backend(pool, seen[0])
+    assert failed.failed_until > time.monotonic() and failed.last_error
+    assert all(b.outstanding == {"text": 0, "table": 0} for b in pool.backends)
+
+
+def test_forward_passes_through_client_errors():
+    pool = make_pool(lambda request: httpx.Response(400, json={"detail": "bad image"}))
+    _, response = forward(pool)
+    assert response.status_code == 400
+    assert all(b.failed_until == 0 for b in pool.backends)
+
+
+def test_forward_gives_up_when_every_backend_fails():
+    pool = make_pool(lambda request: httpx.Response(503))
+    with pytest.raises(GatewayError, match="HTTP 503"):
+        forward(pool, kind="table")
+    assert all(b.outstanding == {"text": 0, "table": 0} for b in pool.backends)
+
+
+def test_forward_counts_outstanding_jobs_while_in_flight():
+    in_flight = []
+
+    async def handler(request):
+        in_flight.append({b.url: dict(b.outstanding) for b in pool.backends})
+        return httpx.Response(200)
+
+    pool = make_pool(handler)
+    answered, _ = forward(pool, kind="table")
+    assert in_flight[0][answered.url] == {"text": 0, "table": 1}
+    assert backend(pool, answered.url).outstanding == {"text": 0, "table": 0}
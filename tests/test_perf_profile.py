@@ -0,0 +1,91 @@
+"""
+Autotune candidate grid and performance profile application
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_perf_profile.py
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from service.perf_profile import (  # noqa: E402
+    PROFILE_SETTINGS, apply_perf_profile, load_perf_profile, save_perf_profile
+)
+
+# autotune forces CPU mode on import; keep the rest of the session unaffected
+_device = (config.USE_GPU, config.DEVICE)
+import autotune  # noqa: E402
+config.USE_GPU, config.DEVICE = _device
+
+TUNED = {
+    "cpu_threads": 3,
+    "enable_mkldnn": False,
+    "executor_workers": 2,
+    "text_det_limit_side_len": 736,
+    "text_rec_batch_size": 8,
+}
+
+
+@pytest.fixture
+def cpu_config(monkeypatch):
+    """CPU mode, with every setting a profile can override restored afterwards"""
+    for attr in PROFILE_SETTINGS.values():
+        monkeypatch.setattr(config, attr, getattr(config, attr))
+    monkeypatch.setattr(config, "DEVICE", "cpu")
+    return config
+
+
+def grid_args(**overrides):
+    options = dict(threads=[1, 2, 4], workers=[1, 2, 4], mkldnn=[True], side_len=[960], batch=[6])
+    options.update(overrides)
+    return argparse.Namespace(**options)
+
+
+def test_candidate_grid_skips_oversubscribed_combinations():
+    candidates = autotune.candidate_grid(grid_args(), cpu_count=4)
+    pairs = sorted((c["cpu_threads"], c["executor_workers"]) for c in candidates)
+    assert pairs == [(1, 1), (1, 2), (1, 4), (2, 1), (2, 2), (4, 1)]
+    assert set(candidates[0]) == set(PROFILE_SETTINGS)
+
+
+def test_candidate_grid_covers_every_option():
+    args = grid_args(threads=[1], workers=[1], mkldnn=[True, False], side_len=[640, 960], batch=[1, 6])
+    assert len(autotune.candidate_grid(args, cpu_count=1)) == 8
+
+
+def test_apply_profile_overrides_settings(cpu_config):
+    profile = {"device": "cpu", "cpu_count": os.cpu_count(), "settings": TUNED}
+    assert apply_perf_profile(profile)
+    assert config.CPU_THREADS == 3 and config.EXECUTOR_WORKERS == 2
+    assert config.TEXT_DET_LIMIT_SIDE_LEN == 736 and config.TEXT_REC_BATCH_SIZE == 8
+    assert config.ENABLE_MKLDNN is False
+
+
+@pytest.mark.parametrize("profile", [
+    None,
+    {},
+    {"device": "gpu", "cpu_count": os.cpu_count(), "settings": TUNED},
+    {"device": "cpu", "cpu_count": (os.cpu_count() or 1) * 4, "settings": TUNED},
+    {"device": "cpu", "settings": TUNED},
+])
+def test_mismatched_profile_is_skipped(cpu_config, profile):
+    before = {attr: getattr(config, attr) for attr in PROFILE_SETTINGS.values()}
+    assert not apply_perf_profile(profile)
+    assert {attr: getattr(config, attr) for attr in PROFILE_SETTINGS.values()} == before
+
+
+def test_profile_round_trip(tmp_path):
+    path = tmp_path / "perf_profile.json"
+    profile = {"device": "cpu", "cpu_count": 8, "settings": TUNED}
+    assert save_perf_profile(profile, path) == path
+    assert load_perf_profile(path) == profile
+    assert load_perf_profile(tmp_path / "missing.json") is None
+    path.write_text("{not json", encoding="utf-8")
+    assert load_perf_profile(path) is None
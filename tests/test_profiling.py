@@ -0,0 +1,124 @@
+"""
+Server-Timing, stack sampling sessions, profile retention and the admin token guard
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_profiling.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+import profiling  # noqa: E402
+from profiling import ProfileStore, RequestTimer, StackSampler  # noqa: E402
+
+
+def test_server_timing_header():
+    timer = RequestTimer()
+    timer.add("validation", 1.25)
+    timer.add("inference", 10)
+    timer.add("inference", 5)  # Repeated stages accumulate
+    with timer.stage("parse"):
+        pass
+
+    parts = timer.server_timing_header().split(", ")
+    assert parts[:2] == ["validation;dur=1.2", "inference;dur=15.0"]
+    assert parts[2].startswith("parse;dur=")
+    assert parts[3].startswith("total;dur=")
+    assert float(parts[3].split("=")[1]) >= 0
+
+
+def test_profile_store_keeps_newest_profiles(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=3)
+    ids = []
+    for i in range(5):
+        ids.append(store.save("/ocr", 100.0 + i, {"inference": 50.0}, Counter({"main;run": 3})))
+        # Pruning is by modification time
+        os.utime(tmp_path / f"{ids[-1]}.json", (i, i))
+
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == sorted(ids[2:])
+    profile = json.loads((tmp_path / f"{ids[-1]}.json").read_text(encoding="utf-8"))
+    assert profile["path"] == "/ocr" and profile["samples"] == {"main;run": 3}
+
+
+def test_sampler_session_only_sees_its_threads():
+    release = threading.Event()
+
+    def own_work():
+        release.wait()
+
+    def other_work():
+        release.wait()
+
+    threads = [threading.Thread(target=own_work), threading.Thread(target=other_work)]
+    for t in threads:
+        t.start()
+    sampler = StackSampler(interval_ms=5)
+    try:
+        session = sampler.start_session({threads[0].ident})
+        time.sleep(0.2)
+        samples = sampler.stop_session(session)
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+
+    assert samples
+    assert all("own_work" in stack for stack in samples)
+    assert not any("other_work" in stack for stack in samples)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(config, "SLOW_REQUEST_PROFILING", False)
+    monkeypatch.setattr(profiling, "profile_store", ProfileStore(tmp_path, max_profiles=5))
+
+    app = FastAPI()
+    app.middleware("http")(profiling.server_timing_middleware)
+
+    @app.post("/ocr")
+    async def ocr(request: Request):
+        with profiling.get_request_timer(request).stage("inference"):
+            pass
+        return {"success": True}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("headers", [
+    {"X-Profile": "1"},
+    {"X-Profile": "1", "X-Admin-Token": "wrong"},
+    {"X-Profile": "true", "X-Admin-Token": "sécret".encode()},
+])
+def test_on_demand_profile_requires_admin_token(client, headers):
+    response = client.post("/ocr", headers=headers)
+    assert response.status_code == 403
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_on_demand_profile_with_token(client):
+    response = client.post("/ocr", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "inference;dur=" in response.headers["Server-Timing"]
+    assert response.headers["X-Profile-Id"]
+
+
+def test_unprofiled_request_gets_server_timing_only(client):
+    response = client.post("/ocr")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("inference;dur=")
+    assert "X-Profile-Id" not in response.headers
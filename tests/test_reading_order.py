@@ -0,0 +1,157 @@
+"""
+Reading-order reconstruction: columns, tables, skewed lines, degenerate boxes and speed
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_reading_order.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from service.reading_order import boxes_from_polys, reconstruct_reading_order  # noqa: E402
+
+# Dense pages must stay well under a frame of inference time
+LARGE_PAGE_BOXES = 5000
+LARGE_PAGE_BUDGET_S = 0.5
+
+
+def read_lines(boxes, labels):
+    """Labels grouped by line, in reading order"""
+    ro = reconstruct_reading_order(np.asarray(boxes, dtype=np.float64))
+    return [
+        [labels[i] for i in ro.order[start:end]]
+        for start, end in zip(ro.line_starts, ro.line_ends)
+    ]
+
+
+def rect_poly(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_two_columns_under_full_width_title():
+    boxes, labels = [[0, 0, 400, 20]], ["title"]
+    for side, (x0, x1) in (("L", (0, 180)), ("R", (220, 400))):
+        for row, y in enumerate((40, 65, 90)):
+            boxes.append([x0, y, x1, y + 20])
+            labels.append(f"{side}{row}")
+    # Shuffle the input so the order comes from the geometry alone
+    perm = np.random.default_rng(0).permutation(len(boxes))
+    boxes, labels = [boxes[i] for i in perm], [labels[i] for i in perm]
+
+    ro = reconstruct_reading_order(np.asarray(boxes, dtype=np.float64))
+    assert [labels[i] for i in ro.order] == ["title", "L0", "L1", "L2", "R0", "R1", "R2"]
+    # Title, left column, right column
+    assert len(ro.paragraph_starts) == 3
+    assert ro.paragraph_boxes.tolist()[0] == [0, 0, 400, 20]
+
+
+def test_table_grid_is_read_row_by_row():
+    cell_width, gap, rows, cols = 60, 40, 3, 4
+    boxes, labels = [], []
+    for r in range(rows):
+        for c in range(cols):
+            x0 = c * (cell_width + gap)
+            boxes.append([x0, r * 30, x0 + cell_width, r * 30 + 20])
+            labels.append(f"r{r}c{c}")
+    # Column-major input, as a detector scanning cells might return them
+    boxes = [boxes[r * cols + c] for c in range(cols) for r in range(rows)]
+    labels = [labels[r * cols + c] for c in range(cols) for r in range(rows)]
+
+    assert read_lines(boxes, labels) == [[f"r{r}c{c}" for c in range(cols)] for r in range(rows)]
+
+
+def test_table_with_wide_first_column_is_read_row_by_row():
+    # Invoice: description, quantity and price columns
+    boxes, labels = [], []
+    for r in range(4):
+        for name, (x0, x1) in (("desc", (0, 200)), ("qty", (350, 450)), ("price", (650, 800))):
+            boxes.append([x0, r * 30, x1, r * 30 + 20])
+            labels.append(f"{name}{r}")
+
+    assert read_lines(boxes, labels) == [[f"desc{r}", f"qty{r}", f"price{r}"] for r in range(4)]
+
+
+def test_table_with_wrapped_description_keeps_rows_together():
+    # Descriptions wrap onto a second line; quantity and price sit on the first
+    boxes, labels = [], []
+    for r in range(4):
+        top = r * 60
+        boxes += [[0, top, 200, top + 20], [0, top + 25, 150, top + 45]]
+        labels += [f"desc{r}a", f"desc{r}b"]
+        boxes += [[350, top, 450, top + 20], [650, top, 800, top + 20]]
+        labels += [f"qty{r}", f"price{r}"]
+
+    lines = read_lines(boxes, labels)
+    assert lines[::2] == [[f"desc{r}a", f"qty{r}", f"price{r}"] for r in range(4)]
+    assert lines[1::2] == [[f"desc{r}b"] for r in range(4)]
+
+
+def test_row_aligned_text_columns_with_a_narrow_gutter_stay_columns():
+    # Two text columns on the same baseline grid, separated by a normal gutter
+    boxes, labels = [], []
+    for side, (x0, x1) in (("L", (0, 300)), ("R", (340, 640))):
+        for row in range(6):
+            boxes.append([x0, row * 25, x1, row * 25 + 20])
+            labels.append(f"{side}{row}")
+
+    expected = [f"L{r}" for r in range(6)] + [f"R{r}" for r in range(6)]
+    assert [line[0] for line in read_lines(boxes, labels)] == expected
+
+
+def test_skewed_single_line():
+    # Eight words drifting 4px down per word: 28px in total, more than a line height
+    polys = [rect_poly(i * 50, i * 4, i * 50 + 40, i * 4 + 20) for i in range(8)]
+    labels = [f"w{i}" for i in range(8)]
+    polys, labels = polys[::-1], labels[::-1]
+
+    assert read_lines(boxes_from_polys(polys), labels) == [[f"w{i}" for i in range(8)]]
+
+
+def test_boxes_from_polys_handles_empty_and_ragged_polygons():
+    # All-empty polygons go through the ValueError fallback and give zero boxes
+    assert boxes_from_polys([[], [], []]).tolist() == [[0, 0, 0, 0]] * 3
+    # Mixed point counts and missing polygons
+    boxes = boxes_from_polys([rect_poly(1, 2, 3, 4), [], [[5, 6], [7, 8], [6, 9]]])
+    assert boxes.tolist() == [[1, 2, 3, 4], [0, 0, 0, 0], [5, 6, 7, 9]]
+    assert boxes_from_polys([]).shape == (0, 4)
+
+
+def test_degenerate_boxes():
+    ro = reconstruct_reading_order(boxes_from_polys([[], [], []]))
+    assert sorted(ro.order.tolist()) == [0, 1, 2]
+    assert len(ro.line_starts) == 1 and len(ro.paragraph_starts) == 1
+
+    ro = reconstruct_reading_order(np.zeros((0, 4)))
+    assert len(ro.order) == 0 and len(ro.line_starts) == 0 and ro.paragraph_boxes.shape == (0, 4)
+
+    ro = reconstruct_reading_order(np.asarray([[10, 10, 50, 30]], dtype=np.float64))
+    assert ro.order.tolist() == [0] and ro.line_boxes.tolist() == [[10, 10, 50, 30]]
+
+
+def test_large_page_is_fast():
+    # Two columns of short words: 2 x 125 lines x 20 words. The columns'
+    # baselines are offset by half a line, so they do not read as table rows
+    boxes = []
+    for column_x, column_y in ((0, 0), (1100, 12)):
+        for line in range(LARGE_PAGE_BOXES // 2 // 20):
+            for word in range(20):
+                x0, y0 = column_x + word * 50, column_y + line * 25
+                boxes.append([x0, y0, x0 + 40, y0 + 20])
+    boxes = np.asarray(boxes, dtype=np.float64)
+    boxes = boxes[np.random.default_rng(1).permutation(len(boxes))]
+    assert len(boxes) == LARGE_PAGE_BOXES
+
+    reconstruct_reading_order(boxes)  # Warm up NumPy
+    start = time.perf_counter()
+    ro = reconstruct_reading_order(boxes)
+    elapsed = time.perf_counter() - start
+
+    assert len(ro.line_starts) == 2 * LARGE_PAGE_BOXES // 2 // 20
+    assert elapsed < LARGE_PAGE_BUDGET_S, f"{LARGE_PAGE_BOXES} boxes took {elapsed * 1000:.0f}ms"
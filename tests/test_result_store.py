@@ -0,0 +1,174 @@
+"""
+Result store: batched background writes, rotation, lookups, failure handling
+and the model fingerprint in cache keys
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_result_store.py
+"""
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from service.result_store import ResultStore  # noqa: E402
+
+
+def make_store(tmp_path, **overrides):
+    options = dict(queue_size=1000, batch_size=10, flush_interval=0.05, max_bytes=10 ** 9, keep_rotated=2)
+    options.update(overrides)
+    return ResultStore(tmp_path / "results.sqlite3", **options)
+
+
+def in_file(path, image_hash):
+    """Whether a database file contains a record for the image"""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM results WHERE image_hash = ?", (image_hash,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def test_records_are_written_in_batches(tmp_path):
+    store = make_store(tmp_path, batch_size=10)
+    batches = []
+    write = store._write
+    store._write = lambda conn, batch: (batches.append(len(batch)), write(conn, batch))[1]
+
+    for i in range(25):
+        assert store.submit(f"h{i}", "ocr", texts=["a"], scores=[0.9], polygons=[[[0, 0], [1, 1]]],
+                            timings={"inference": 12.345})
+    store.start()
+    store.stop()
+
+    assert batches == [10, 10, 5]
+    record = store.lookup("h3")[0]
+    assert record["texts"] == ["a"] and record["polygons"] == [[[0, 0], [1, 1]]]
+    assert record["timings"] == {"inference": 12.3}
+    assert store.report()["queued"] == 0
+
+
+def test_pending_records_are_visible_before_they_are_written(tmp_path):
+    store = make_store(tmp_path)
+    store.submit("h", "table", params={"format": "text"}, content="a | b")
+
+    assert [r["content"] for r in store.lookup("h", "table", {"format": "text"})] == ["a | b"]
+    assert store.lookup("h", "table", {"format": "markdown"}) == []
+    assert store.lookup("h", "ocr") == []
+
+
+def test_rotation_and_lookup_across_rotated_files(tmp_path):
+    store = make_store(tmp_path, batch_size=5, max_bytes=20000, keep_rotated=2)
+    store.start()
+    for i in range(200):
+        while not store.submit(f"h{i}", "ocr", texts=["x" * 200] * 5, scores=[0.5] * 5):
+            time.sleep(0.01)
+    store.stop()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["results.1.sqlite3", "results.2.sqlite3", "results.sqlite3"]
+    # The oldest records were rotated out; the rest are found in any of the files
+    found = [i for i in range(200) if store.lookup(f"h{i}")]
+    assert found == list(range(found[0], 200)) and found[0] > 0
+    assert not in_file(tmp_path / "results.sqlite3", f"h{found[0]}")
+    assert store.lookup("h199")
+
+
+def test_full_queue_drops_records(tmp_path):
+    store = make_store(tmp_path, queue_size=3)
+    results = [store.submit(f"h{i}", "ocr") for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert store.report()["dropped"] == 2
+    assert store.lookup("h4") == []
+
+
+def test_writer_survives_io_errors(tmp_path):
+    # The database path is a directory, so connecting fails
+    store = make_store(tmp_path)
+    store.path.mkdir()
+    store.start()
+    store.submit("lost", "ocr")
+    deadline = time.monotonic() + 5
+    while store.report()["last_error"] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.report()["last_error"] is not None
+    assert store.report()["running"]
+
+    # Once the disk is usable again the writer carries on
+    store.path.rmdir()
+    store.submit("kept", "ocr")
+    store.stop()
+    assert in_file(store.path, "kept")
+    assert store.report()["last_error"] is None
+
+
+def test_stop_does_not_hang_on_a_full_queue(tmp_path):
+    store = make_store(tmp_path, queue_size=2)
+    blocked = threading.Event()
+    store._write = lambda conn, batch: blocked.wait() and None  # Writer stuck on disk
+    store.start()
+    for i in range(10):
+        store.submit(f"h{i}", "ocr")
+
+    started = time.monotonic()
+    store.stop(timeout=0.3)
+    assert time.monotonic() - started < 2
+    blocked.set()
+
+
+def test_lookup_skips_files_without_table_but_raises_on_other_errors(tmp_path):
+    store = make_store(tmp_path, keep_rotated=1)
+    # Created by a writer that has not run its schema yet
+    sqlite3.connect(store.path).close()
+    assert store.lookup("h") == []
+
+    # A rotated file with an incompatible schema is reported, not hidden
+    conn = sqlite3.connect(store._rotated_path(1))
+    conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY)")
+    conn.close()
+    with pytest.raises(sqlite3.OperationalError, match="no such column"):
+        store.lookup("h")
+
+
+def test_model_fingerprint_follows_output_settings(monkeypatch):
+    pytest.importorskip("pydantic")
+    from service.ocr_service import model_fingerprint
+    from service.result_store import make_params_key
+
+    monkeypatch.setattr(config, "DEVICE", "cpu")
+    monkeypatch.setattr(config, "CASCADE_CONFIG", dict(config.CASCADE_CONFIG, enabled=False))
+    base = make_params_key(model_fingerprint("ocr"))
+
+    # Speed-only settings keep cached results valid
+    monkeypatch.setattr(config, "CPU_THREADS", config.CPU_THREADS + 1)
+    monkeypatch.setattr(config, "TEXT_REC_BATCH_SIZE", config.TEXT_REC_BATCH_SIZE + 1)
+    assert make_params_key(model_fingerprint("ocr")) == base
+
+    changes = [
+        ("TEXT_DET_LIMIT_SIDE_LEN", config.TEXT_DET_LIMIT_SIDE_LEN + 32),
+        ("TEXT_DET_LIMIT_TYPE", "min"),
+        ("TEXT_OCR_CONFIG", dict(config.TEXT_OCR_CONFIG, text_recognition_model_dir="/models/other")),
+        ("CASCADE_CONFIG", dict(config.CASCADE_CONFIG, enabled=True)),
+    ]
+    keys = {base}
+    for name, value in changes:
+        with monkeypatch.context() as m:
+            m.setattr(config, name, value)
+            keys.add(make_params_key(model_fingerprint("ocr")))
+    assert len(keys) == len(changes) + 1
+
+    monkeypatch.setattr(config, "CASCADE_CONFIG", dict(config.CASCADE_CONFIG, enabled=True))
+    cascade = make_params_key(model_fingerprint("ocr"))
+    monkeypatch.setattr(config, "CASCADE_CONFIG", dict(config.CASCADE_CONFIG, score_threshold=0.5))
+    assert make_params_key(model_fingerprint("ocr")) != cascade
+
+    table = make_params_key(model_fingerprint("table"))
+    monkeypatch.setattr(config, "TABLE_OCR_CONFIG", dict(config.TABLE_OCR_CONFIG, lang="en"))
+    assert make_params_key(model_fingerprint("table")) != table
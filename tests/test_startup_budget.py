@@ -0,0 +1,143 @@
+"""
+Startup budget checks: heavy imports stay lazy and /health is served quickly
+
+Run with pytest, or directly for an import-time report:
+    python tests/test_startup_budget.py
+
+Budgets can be overridden with OCR_IMPORT_BUDGET_MS and OCR_STARTUP_BUDGET_MS.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported on first model use
+HEAVY_MODULES = {"paddle", "paddleocr", "paddlex", "cv2", "numpy", "PIL"}
+
+IMPORT_BUDGET_MS = float(os.environ.get("OCR_IMPORT_BUDGET_MS", 800))
+STARTUP_BUDGET_MS = float(os.environ.get("OCR_STARTUP_BUDGET_MS", 1000))
+
+
+def import_time_report(module: str = "main") -> Tuple[float, List[Tuple[float, float, str]]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        (total cumulative ms, [(cumulative ms, self ms, module name), ...] sorted slowest first)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    entries = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative_ms = int(cumulative_us) / 1000
+        entries.append((cumulative_ms, int(self_us) / 1000, name.rstrip()))
+        if name.strip() == module:
+            total = cumulative_ms
+    entries.sort(reverse=True)
+    return total, entries
+
+
+def imported_top_level_modules(module: str) -> set:
+    """Top-level packages present in sys.modules after importing `module`"""
+    code = f"import json, sys, {module}; print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+
+def format_report(entries: List[Tuple[float, float, str]], limit: int = 20) -> str:
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    lines += [f"{cum:14.1f} {own:9.1f}  {name}" for cum, own, name in entries[:limit]]
+    return "\n".join(lines)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_health_startup(timeout: float = 30.0) -> float:
+    """
+    Start the server in a subprocess and time until /health first answers 200
+
+    Returns:
+        Milliseconds from process start to the first successful /health
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health not served within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+@pytest.mark.parametrize("module", ["main", "models", "service"])
+def test_heavy_modules_are_lazy(module):
+    loaded = imported_top_level_modules(module) & HEAVY_MODULES
+    assert not loaded, f"importing {module} pulled in {sorted(loaded)}"
+
+
+def test_import_time_budget():
+    total, entries = import_time_report("main")
+    print("\n" + format_report(entries))
+    assert total < IMPORT_BUDGET_MS, (
+        f"import main took {total:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)\n" + format_report(entries)
+    )
+
+
+def test_config_import_has_no_side_effects():
+    code = "import config; print(config.OUTPUT_DIR.exists())"
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    before = (ROOT / "output").exists()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True)
+    assert (ROOT / "output").exists() == before
+
+
+def test_health_startup_budget():
+    pytest.importorskip("uvicorn")
+    elapsed = measure_health_startup()
+    assert elapsed < STARTUP_BUDGET_MS, (
+        f"first /health after {elapsed:.0f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    total, entries = import_time_report("main")
+    print("=" * 60)
+    print("IMPORT TIME REPORT (import main)")
+    print("=" * 60)
+    print(format_report(entries))
+    print(f"\n⏱️ Total: {total:.1f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)")
+    print(f"🚀 First /health: {measure_health_startup():.1f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)")
@@ -0,0 +1,73 @@
+"""
+Streaming OCR state: region expansion/merging and text diffs
+
+Run with pytest from the repository root:
+    python -m pytest -q tests/test_stream.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models import BoundingBox, OCRTextResult  # noqa: E402
+from service.stream import StreamTextState, regions_too_large  # noqa: E402
+
+
+def line(text, x0, y0, x1, y1):
+    return OCRTextResult(
+        text=text,
+        confidence=0.9,
+        bounding_box=BoundingBox(points=[[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+    )
+
+
+def test_changes_on_one_line_are_merged():
+    state = StreamTextState()
+    state.update([line("a long line", 0, 0, 400, 20)])
+
+    regions = state.expand_regions([(10, 5, 30, 15), (300, 5, 320, 15)])
+    assert regions == [(0, 0, 401, 21)]
+
+    diff = state.update([line("a long line", 0, 0, 400, 20)], regions)
+    assert len(state.results) == 1
+    assert diff == {"added": [], "removed": []}
+
+
+def test_merging_reaches_lines_touched_by_the_union():
+    state = StreamTextState()
+    state.update([line("top", 0, 0, 100, 20), line("right", 150, 30, 300, 50)])
+
+    # Both changes grow onto "top"; their union then touches "right"
+    regions = state.expand_regions([(5, 5, 10, 10), (90, 5, 160, 35)])
+    assert regions == [(0, 0, 301, 51)]
+
+
+def test_separate_changes_stay_separate():
+    state = StreamTextState()
+    state.update([line("first", 0, 0, 100, 20), line("second", 0, 100, 100, 120)])
+
+    regions = state.expand_regions([(10, 5, 20, 15), (10, 105, 20, 115)])
+    assert regions == [(0, 0, 101, 21), (0, 100, 101, 121)]
+
+    diff = state.update([line("first", 0, 0, 100, 20), line("changed", 0, 100, 100, 120)], regions)
+    assert [r.text for r in state.results] == ["first", "changed"]
+    assert [r["text"] for r in diff["added"]] == ["changed"]
+    assert [r["text"] for r in diff["removed"]] == ["second"]
+
+
+def test_merged_regions_can_exceed_the_region_budget():
+    state = StreamTextState()
+    state.update([line("banner", 0, 0, 400, 90)])
+
+    # Two small changes that, merged over the banner, cover most of the frame
+    small = [(10, 10, 20, 20), (380, 10, 390, 20)]
+    assert not regions_too_large(small, 400, 100)
+    regions = state.expand_regions(small)
+    assert regions == [(0, 0, 401, 91)]
+    assert regions_too_large(regions, 400, 100)
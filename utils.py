@@ -1,12 +1,12 @@
 """
 Utility functions for image processing and validation
 """
+import hashlib
 import os
 import tempfile
 from pathlib import Path
 from typing import BinaryIO
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 import config
 
 
@@ -39,7 +39,8 @@ async def validate_image(file: UploadFile) -> None:
             detail=f"File too large. Maximum size: {config.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
         )
     
-    # Validate it's a real image
+    # Validate it's a real image (Pillow is imported on first use to keep startup fast)
+    from PIL import Image
     try:
         image = Image.open(file.file)
         image.verify()
@@ -77,6 +78,21 @@ async def save_upload_file_tmp(upload_file: UploadFile) -> str:
         )
 
 
+async def hash_upload_file(upload_file: UploadFile) -> str:
+    """
+    Compute the SHA-256 of an uploaded file
+    
+    Args:
+        upload_file: FastAPI UploadFile object
+        
+    Returns:
+        Hex digest of the file content
+    """
+    content = await upload_file.read()
+    await upload_file.seek(0)  # Reset file pointer
+    return hashlib.sha256(content).hexdigest()
+
+
 def cleanup_temp_file(file_path: str) -> None:
     """
     Remove temporary file